@@ -0,0 +1,36 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import time
+from typing import Any, Callable, Iterable
+
+
+def mean_time(func: Callable[[Any], Any], inputs: Iterable, rounds: int) -> float:
+    """Measure how long a function takes per input.
+
+    Parameters:
+        func: The function to measure.
+        inputs: The inputs to call it with.
+        rounds: How many times to call it with every input.
+
+    Returns:
+        The mean number of seconds per call.
+    """
+    inputs = list(inputs)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for item in inputs:
+            func(item)
+    return (time.perf_counter() - start) / (rounds * len(inputs))
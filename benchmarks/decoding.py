@@ -0,0 +1,80 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+"""Measure the cost of decoding API responses, strictly first against applying every repair up front.
+
+Each response is decoded by the API class of its firmware, so it goes through that firmware's repairs.
+Responses are read from `benchmarks/responses/<api>/`, in the form they are sent on the wire, without the null byte.
+Add responses captured from your own miners there, such as with `echo -n '{"command":"stats"}' | nc <ip> 4028`.
+
+Run from the root of the repository with `python -m benchmarks.decoding`.
+"""
+import json
+from pathlib import Path
+
+from benchmarks.common import mean_time
+from pyasic.API.bmminer import BMMinerAPI
+from pyasic.API.bosminer import BOSMinerAPI
+from pyasic.API.btminer import BTMinerAPI
+from pyasic.API.cgminer import CGMinerAPI
+from pyasic.API.decoding import _error_code_list, _leading_comma, _truncated
+
+RESPONSES = Path(__file__).parent / "responses"
+APIS = {
+    "bmminer": BMMinerAPI,
+    "bosminer": BOSMinerAPI,
+    "btminer": BTMinerAPI,
+    "cgminer": CGMinerAPI,
+}
+
+
+def legacy(data: bytes) -> dict:
+    # the previous pipeline, every repair on every response
+    str_data = data.decode("utf-8")
+    if str_data.endswith("\x00"):
+        str_data = str_data[:-1]
+    for old, new in [
+        (",}", "}"),
+        ("\n", ""),
+        ("}{", "},{"),
+        ("[,{", "[{"),
+        ('""temp0', '","temp0'),
+        ("info", "1nfo"),
+        ("inf", "0"),
+        ("1nfo", "info"),
+        ("nan", "0"),
+    ]:
+        str_data = str_data.replace(old, new)
+    str_data = _leading_comma(str_data)
+    str_data = _truncated(str_data)
+    str_data = _error_code_list(str_data)
+    return json.loads(str_data)
+
+
+def main(rounds: int = 200) -> None:
+    for name, api in APIS.items():
+        for path in sorted((RESPONSES / name).glob("*.json")):
+            response = path.read_bytes()
+            if api._null_terminated:
+                response += b"\x00"
+            old = mean_time(legacy, [response], rounds)
+            new = mean_time(api._load_api_data, [response], rounds)
+            print(
+                f"{name}/{path.stem}: {len(response)} bytes, {old * 1e6:.1f} us repaired, {new * 1e6:.1f} us strict first"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+"""Measure the cost of fingerprinting a response.
+
+Run from the root of the repository with `python -m benchmarks.fingerprint`.
+"""
+from benchmarks.common import mean_time
+from pyasic.miners.miner_factory import SOCKET_SIGNATURES, WEB_SIGNATURES
+
+SOCKET_RESPONSES = [
+    '{"STATUS":[{"STATUS":"S","Msg":"BMMiner versions"}],"VERSION":[{"BMMiner":"1.0.0","API":"3.1","Miner":"49.0.1.3","CompileTime":"Thu Jan 1","Type":"Antminer S19"}],"id":1}',
+    '{"STATUS":[{"STATUS":"S","Msg":"Device Details"}],"DEVDETAILS":[{"DEVDETAILS":0,"Name":"SM","ID":0,"Driver":"bitmicro","Kernel":"","Model":"M30S+VG40"}],"id":1}',
+    '{"STATUS":[{"STATUS":"E","Msg":"Invalid command"}],"id":1}',
+]
+WEB_RESPONSES = [
+    "<html><head><title>Braiins OS</title></head><body>"
+    + "x" * 4000
+    + "</body></html>",
+    "<html><head><title>Miner</title></head><body>"
+    + "<div>" * 20000
+    + "AnthillOS</body></html>",
+    "<html><body>" + "y" * 50000 + "</body></html>",
+]
+
+
+def main(rounds: int = 1000) -> None:
+    for name, registry, responses in [
+        ("socket", SOCKET_SIGNATURES, SOCKET_RESPONSES),
+        ("web", WEB_SIGNATURES, WEB_RESPONSES),
+    ]:
+        per_response = mean_time(registry.match, responses, rounds)
+        mean_size = sum(len(r) for r in responses) / len(responses)
+        print(
+            f"{name}: {len(registry)} signatures, {per_response * 1e6:.1f} us per response (mean {mean_size:.0f} chars)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -18,14 +18,36 @@ import asyncio
 import ipaddress
 import json
 import logging
-import re
 import warnings
-from typing import Union
-
+from typing import FrozenSet, Optional, Union
+
+from pyasic.API.capabilities import (
+    MulticommandCapabilities,
+    capability_cache,
+    is_invalid_command,
+)
+from pyasic.API.decoding import ALL_REPAIRS, Repairs, load_api_data
+from pyasic.API.framing import ResponseBuffer, read_response
+from pyasic.API.registry import CommandRegistry, build_command_registry
 from pyasic.errors import APIError, APIWarning
+from pyasic.limiter import host_limiter
 
 
 class BaseMinerAPI:
+    # repairs for malformed responses from this firmware, every known repair is tried after these
+    _api_repairs: Repairs = ALL_REPAIRS
+    # whether every response ends with a null byte, so a balanced JSON object isn't necessarily the end of it
+    _null_terminated: bool = False
+    # names of commands that need privileged access, and of commands that change the state of the miner
+    _privileged_commands: FrozenSet[str] = frozenset()
+    _mutating_commands: FrozenSet[str] = frozenset()
+    # the commands of the class, built when it is created
+    command_registry: CommandRegistry = CommandRegistry([])
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.command_registry = build_command_registry(cls, BaseMinerAPI)
+
     def __init__(self, ip: str, port: int = 4028) -> None:
         # api port, should be 4028
         self.port = port
@@ -33,6 +55,8 @@ class BaseMinerAPI:
         self.ip = ipaddress.ip_address(ip)
 
         self.pwd = "admin"
+        # the make of the miner, which picks its connection limit
+        self.vendor: Optional[str] = None
 
     def __new__(cls, *args, **kwargs):
         if cls is BaseMinerAPI:
@@ -108,9 +132,15 @@ class BaseMinerAPI:
             allow_warning: A boolean to supress APIWarnings.
 
         """
+        capabilities = self._multicommand_capabilities()
+        # make sure we can actually run each command, otherwise they will fail
+        # skip commands this miner is known to reject, rather than resending the batch without them
+        commands = [
+            command
+            for command in self._check_commands(*commands)
+            if not capabilities.is_unsupported(command)
+        ]
         while True:
-            # make sure we can actually run each command, otherwise they will fail
-            commands = self._check_commands(*commands)
             # standard multicommand format is "command1+command2"
             # standard format doesn't work for X19
             command = "+".join(commands)
@@ -123,12 +153,20 @@ class BaseMinerAPI:
                         err_command = e.message.split(":")[0]
                         if err_command in commands:
                             commands.remove(err_command)
+                            # only remember commands the miner doesn't know, other errors may pass
+                            if is_invalid_command(e.message):
+                                capabilities.mark_unsupported(err_command)
                             continue
                 return {command: [{}] for command in commands}
             logging.debug(f"{self} - (Multicommand) - Received data")
             data["multicommand"] = True
             return data
 
+    def _multicommand_capabilities(self) -> MulticommandCapabilities:
+        # entries expire after the api_capability_ttl setting, so firmware updates are noticed
+        key = (self.__class__.__name__, str(self.ip), self.port)
+        return capability_cache.get(key)
+
     async def _handle_multicommand(self, command: str, allow_warning: bool = True):
         try:
             data = await self.send_command(command, allow_warning=allow_warning)
@@ -151,26 +189,10 @@ class BaseMinerAPI:
         Returns:
             A list of all API commands that the miner supports.
         """
-        return [
-            func
-            for func in
-            # each function in self
-            dir(self)
-            if not func == "commands"
-            if callable(getattr(self, func)) and
-            # no __ or _ methods
-            not func.startswith("__") and not func.startswith("_") and
-            # remove all functions that are in this base class
-            func
-            not in [
-                func
-                for func in dir(BaseMinerAPI)
-                if callable(getattr(BaseMinerAPI, func))
-            ]
-        ]
+        return list(self.command_registry)
 
     def _check_commands(self, *commands):
-        allowed_commands = self.commands
+        allowed_commands = self.command_registry
         return_commands = []
 
         for command in commands:
@@ -190,58 +212,60 @@ If you are sure you want to use this command please use API.send_command("{comma
         timeout: int = 100,
     ) -> bytes:
         logging.debug(f"{self} - ([Hidden] Send Bytes) - Sending")
-        try:
-            # get reader and writer streams
-            reader, writer = await asyncio.open_connection(str(self.ip), self.port)
-        # handle OSError 121
-        except OSError as e:
-            if e.errno == 121:
-                logging.warning(
-                    f"{self} - ([Hidden] Send Bytes) - Semaphore timeout expired."
-                )
-            return b"{}"
-
-        # send the command
-        logging.debug(f"{self} - ([Hidden] Send Bytes) - Writing")
-        writer.write(data)
-        logging.debug(f"{self} - ([Hidden] Send Bytes) - Draining")
-        await writer.drain()
-        try:
-            # TO address a situation where a whatsminer has an unknown PW -AND-
-            # Fix for stupid whatsminer bug, reboot/restart seem to not load properly in the loop
-            # have to receive, save the data, check if there is more data by reading with a short timeout
-            # append that data if there is more, and then onto the main loop.
-            # the password timeout might need to be longer than 1, but it seems to work for now.
-            ret_data = await asyncio.wait_for(reader.read(1), timeout=1)
-        except asyncio.TimeoutError:
-            return b"{}"
-        try:
-            ret_data += await asyncio.wait_for(reader.read(4096), timeout=timeout)
-        except ConnectionAbortedError:
-            return b"{}"
-
-        # loop to receive all the data
-        logging.debug(f"{self} - ([Hidden] Send Bytes) - Receiving")
-        try:
-            while True:
+        async with host_limiter.connection(self.ip, self.vendor):
+            try:
+                # get reader and writer streams
+                reader, writer = await asyncio.open_connection(str(self.ip), self.port)
+            # handle OSError 121
+            except OSError as e:
+                if e.errno == 121:
+                    logging.warning(
+                        f"{self} - ([Hidden] Send Bytes) - Semaphore timeout expired."
+                    )
+                return b"{}"
+
+            # send the command
+            logging.debug(f"{self} - ([Hidden] Send Bytes) - Writing")
+            writer.write(data)
+            logging.debug(f"{self} - ([Hidden] Send Bytes) - Draining")
+            await writer.drain()
+            buffer = ResponseBuffer(balanced_json=not self._null_terminated)
+            try:
+                try:
+                    # TO address a situation where a whatsminer has an unknown PW -AND-
+                    # Fix for stupid whatsminer bug, reboot/restart seem to not load properly in the loop
+                    # have to receive, save the data, check if there is more data by reading with a short timeout
+                    # append that data if there is more, and then onto the main loop.
+                    # the password timeout might need to be longer than 1, but it seems to work for now.
+                    buffer.feed(await asyncio.wait_for(reader.read(4096), timeout=1))
+                except asyncio.TimeoutError:
+                    return b"{}"
+
+                # receive the rest of the data, until the response is complete
+                logging.debug(f"{self} - ([Hidden] Send Bytes) - Receiving")
                 try:
-                    d = await asyncio.wait_for(reader.read(4096), timeout=timeout)
-                    if not d:
-                        break
-                    ret_data += d
+                    ret_data = await read_response(
+                        reader, timeout=timeout, buffer=buffer
+                    )
+                except ConnectionAbortedError:
+                    return b"{}"
                 except (asyncio.CancelledError, asyncio.TimeoutError) as e:
                     raise e
-        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
-            raise e
-        except Exception as e:
-            logging.warning(f"{self} - ([Hidden] Send Bytes) - API Command Error {e}")
-
-        # close the connection
-        logging.debug(f"{self} - ([Hidden] Send Bytes) - Closing")
-        writer.close()
-        await writer.wait_closed()
+                except Exception as e:
+                    logging.warning(
+                        f"{self} - ([Hidden] Send Bytes) - API Command Error {e}"
+                    )
+                    ret_data = bytes(buffer.data)
+            finally:
+                # close the connection
+                logging.debug(f"{self} - ([Hidden] Send Bytes) - Closing")
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except (ConnectionError, OSError):
+                    pass
 
-        return ret_data
+            return ret_data
 
     @staticmethod
     def _validate_command_output(data: dict) -> tuple:
@@ -279,45 +303,6 @@ If you are sure you want to use this command please use API.send_command("{comma
                     return False, data["STATUS"][0]["Msg"]
         return True, None
 
-    @staticmethod
-    def _load_api_data(data: bytes) -> dict:
-        # some json from the API returns with a null byte (\x00) on the end
-        if data.endswith(b"\x00"):
-            # handle the null byte
-            str_data = data.decode("utf-8")[:-1]
-        else:
-            # no null byte
-            str_data = data.decode("utf-8")
-        # fix an error with a btminer return having an extra comma that breaks json.loads()
-        str_data = str_data.replace(",}", "}")
-        # fix an error with a btminer return having a newline that breaks json.loads()
-        str_data = str_data.replace("\n", "")
-        # fix an error with a bmminer return not having a specific comma that breaks json.loads()
-        str_data = str_data.replace("}{", "},{")
-        # fix an error with a bmminer return having a specific comma that breaks json.loads()
-        str_data = str_data.replace("[,{", "[{")
-        # fix an error with a btminer return having a missing comma. (2023-01-06 version)
-        str_data = str_data.replace('""temp0', '","temp0')
-        # fix an error with Avalonminers returning inf and nan
-        str_data = str_data.replace("info", "1nfo")
-        str_data = str_data.replace("inf", "0")
-        str_data = str_data.replace("1nfo", "info")
-        str_data = str_data.replace("nan", "0")
-        # fix whatever this garbage from avalonminers is `,"id":1}`
-        if str_data.startswith(","):
-            str_data = f"{{{str_data[1:]}"
-        # try to fix an error with overflowing the receive buffer
-        # this can happen in cases such as bugged btminers returning arbitrary length error info with 100s of errors.
-        if not str_data.endswith("}"):
-            str_data = ",".join(str_data.split(",")[:-1]) + "}"
-
-        # fix a really nasty bug with whatsminer API v2.0.4 where they return a list structured like a dict
-        if re.search(r"\"error_code\":\[\".+\"\]", str_data):
-            str_data = str_data.replace("[", "{").replace("]", "}")
-
-        # parse the json
-        try:
-            parsed_data = json.loads(str_data)
-        except json.decoder.JSONDecodeError as e:
-            raise APIError(f"Decode Error {e}: {str_data}")
-        return parsed_data
+    @classmethod
+    def _load_api_data(cls, data: bytes) -> dict:
+        return load_api_data(data, cls._api_repairs)
@@ -17,6 +17,21 @@ import asyncio
 import logging
 
 from pyasic.API import APIError, BaseMinerAPI
+from pyasic.API.capabilities import is_invalid_command
+from pyasic.API.registry import CGMINER_MUTATING_COMMANDS, CGMINER_PRIVILEGED_COMMANDS
+
+# commands of BFGMiner that cgminer doesn't have, all of which change the state of the miner
+_BFGMINER_COMMANDS = frozenset(
+    {
+        "devscan",
+        "pgarestart",
+        "pprocset",
+        "procdisable",
+        "procenable",
+        "procidentify",
+        "procrestart",
+    }
+)
 
 
 class BFGMinerAPI(BaseMinerAPI):
@@ -37,6 +52,10 @@ class BFGMinerAPI(BaseMinerAPI):
         port: The port to reference the API on.  Default is 4028.
     """
 
+    _null_terminated = True
+    _privileged_commands = CGMINER_PRIVILEGED_COMMANDS | _BFGMINER_COMMANDS
+    _mutating_commands = CGMINER_MUTATING_COMMANDS | _BFGMINER_COMMANDS
+
     def __init__(self, ip: str, api_ver: str = "0.0.0", port: int = 4028):
         super().__init__(ip, port)
         self.api_ver = api_ver
@@ -47,11 +66,21 @@ class BFGMinerAPI(BaseMinerAPI):
         # standard multicommand format is "command1+command2"
         # doesn't work for S19 which uses the backup _x19_multicommand
         command = "+".join(commands)
-        try:
-            data = await self.send_command(command, allow_warning=allow_warning)
-        except APIError:
-            logging.debug(f"{self} - (Multicommand) - Handling X19 multicommand.")
-            data = await self._x19_multicommand(*command.split("+"))
+        capabilities = self._multicommand_capabilities()
+        if capabilities.joined is False:
+            # this firmware is known not to support it, go straight to the backup
+            data = await self._x19_multicommand(*commands)
+        else:
+            try:
+                data = await self.send_command(command, allow_warning=allow_warning)
+                if len(commands) > 1:
+                    capabilities.joined = True
+            except APIError as e:
+                logging.debug(f"{self} - (Multicommand) - Handling X19 multicommand.")
+                # only a rejected joined command means the syntax isn't supported
+                if len(commands) > 1 and is_invalid_command(e.message):
+                    capabilities.joined = False
+                data = await self._x19_multicommand(*commands)
         data["multicommand"] = True
         return data
 
@@ -35,6 +35,9 @@ class BOSMinerAPI(BaseMinerAPI):
         port: The port to reference the API on.  Default is 4028.
     """
 
+    _privileged_commands = frozenset({"pause", "resume"})
+    _mutating_commands = frozenset({"pause", "resume"})
+
     def __init__(self, ip: str, api_ver: str = "0.0.0", port: int = 4028) -> None:
         super().__init__(ip, port=port)
         self.api_ver = api_ver
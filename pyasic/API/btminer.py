@@ -16,19 +16,21 @@
 
 import asyncio
 import base64
-import binascii
 import datetime
+import functools
 import hashlib
 import json
 import logging
 import re
-from typing import Literal, Union
+import weakref
+from typing import Literal, Optional, Tuple, Union
 
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from passlib.handlers.md5_crypt import md5_crypt
 
 from pyasic import settings
 from pyasic.API import BaseMinerAPI
+from pyasic.API.decoding import BTMINER_REPAIRS
 from pyasic.errors import APIError
 from pyasic.misc import api_min_version
 
@@ -75,6 +77,59 @@ def _crypt(word: str, salt: str) -> str:
     return result
 
 
+def _derive_token(
+    pwd: str,
+    salt: str,
+    time: str,
+    newsalt: str,
+    host_passwd_md5: Optional[str] = None,
+) -> Tuple[str, str]:
+    """Derive the password hash and signature of a privileged API token.
+
+    Parameters:
+        pwd: The admin password of the miner.
+        salt: The salt of the password, from the `get_token` command.
+        time: The time from the `get_token` command.
+        newsalt: The salt of the signature, from the `get_token` command.
+        host_passwd_md5: The password hash from an earlier token with the same salt, if there is one.
+
+    Returns:
+        A tuple of the password hash and the signature, `host_passwd_md5` and `host_sign`.
+    """
+    if host_passwd_md5 is None:
+        # encrypt the admin password with the salt, and take the 4th item from the split
+        host_passwd_md5 = _crypt(pwd, "$1$" + salt + "$").split("$")[3]
+    # encrypt the pwd with the time and new salt, and take the 4th item from the split
+    host_sign = _crypt(host_passwd_md5 + time, "$1$" + newsalt + "$").split("$")[3]
+    return host_passwd_md5, host_sign
+
+
+@functools.lru_cache(maxsize=4096)
+def _aes_cipher(host_passwd_md5: str) -> Cipher:
+    # the aes key is the sha256 of host_passwd, which is the same for every command with a token
+    aeskey = hashlib.sha256(host_passwd_md5.encode()).digest()
+    return Cipher(algorithms.AES(aeskey), modes.ECB())
+
+
+class _TokenState:
+    """The privileged API token of a miner, shared by every [`BTMinerAPI`][pyasic.API.btminer.BTMinerAPI] for it."""
+
+    __slots__ = ("lock", "token", "passwd_md5", "__weakref__")
+
+    def __init__(self):
+        # held while fetching a token, so concurrent commands share one refresh
+        self.lock: Optional[asyncio.Lock] = None
+        self.token: Optional[dict] = None
+        # (salt, host_passwd_md5), the salt is fixed per miner so the hash is only derived once
+        self.passwd_md5: Optional[Tuple[str, str]] = None
+
+
+# (ip, port, sha256 of the password) -> token state, dropped once no API for the miner is left
+_token_states: "weakref.WeakValueDictionary[Tuple[str, int, str], _TokenState]" = (
+    weakref.WeakValueDictionary()
+)
+
+
 def _add_to_16(string: str) -> bytes:
     """Add null bytes to a string until the length is a multiple 16
 
@@ -104,13 +159,8 @@ def parse_btminer_priviledge_data(token_data: dict, data: dict):
     """
     # get the encoded data from the dict
     enc_data = data["enc"]
-    # get the aes key from the token data
-    aeskey = hashlib.sha256(token_data["host_passwd_md5"].encode()).hexdigest()
-    # unhexlify the aes key
-    aeskey = binascii.unhexlify(aeskey.encode())
-    # create the required decryptor
-    aes = Cipher(algorithms.AES(aeskey), modes.ECB())
-    decryptor = aes.decryptor()
+    # create the required decryptor from the aes key of the token
+    decryptor = _aes_cipher(token_data["host_passwd_md5"]).decryptor()
     # decode the message with the decryptor
     ret_msg = json.loads(
         decryptor.update(base64.decodebytes(bytes(enc_data, encoding="utf8")))
@@ -137,13 +187,8 @@ def create_privileged_cmd(token_data: dict, command: dict) -> bytes:
     logging.debug(f"(Create Prilileged Command) - Creating Privileged Command")
     # add token to command
     command["token"] = token_data["host_sign"]
-    # encode host_passwd data and get hexdigest
-    aeskey = hashlib.sha256(token_data["host_passwd_md5"].encode()).hexdigest()
-    # unhexlify the encoded host_passwd
-    aeskey = binascii.unhexlify(aeskey.encode())
-    # create a new AES key
-    aes = Cipher(algorithms.AES(aeskey), modes.ECB())
-    encryptor = aes.encryptor()
+    # create an encryptor from the aes key of the token
+    encryptor = _aes_cipher(token_data["host_passwd_md5"]).encryptor()
     # dump the command to json
     api_json_str = json.dumps(command)
     # encode the json command with the aes key
@@ -181,12 +226,53 @@ class BTMinerAPI(BaseMinerAPI):
     this automatically for you and will decode the output to look like
     a normal output from a miner API.
 
+    Concurrent privileged commands share a single token request, also
+    across instances for the same miner, and the AES cipher of each
+    token is cached.  To run the token's md5 crypt
+    rounds in a thread instead of on the event loop, set the
+    `btminer_token_offload` setting.
+
     Parameters:
         ip: The IP of the miner to reference the API on.
         port: The port to reference the API on.  Default is 4028.
         pwd: The admin password of the miner.  Default is admin.
     """
 
+    _api_repairs = BTMINER_REPAIRS
+    _privileged_commands = frozenset(
+        {
+            "adjust_power_limit",
+            "adjust_upfreq_speed",
+            "disable_fast_boot",
+            "disable_web_pools",
+            "enable_fast_boot",
+            "enable_web_pools",
+            "factory_reset",
+            "net_config",
+            "power_off",
+            "power_on",
+            "pre_power_on",
+            "reboot",
+            "reset_led",
+            "restart",
+            "set_fan_zero_speed",
+            "set_high_power",
+            "set_hostname",
+            "set_led",
+            "set_low_power",
+            "set_normal_power",
+            "set_power_pct",
+            "set_power_pct_v2",
+            "set_poweroff_cool",
+            "set_target_freq",
+            "set_temp_offset",
+            "update_firmware",
+            "update_pools",
+            "update_pwd",
+        }
+    )
+    _mutating_commands = _privileged_commands
+
     def __init__(
         self,
         ip: str,
@@ -196,9 +282,32 @@ class BTMinerAPI(BaseMinerAPI):
     ):
         super().__init__(ip, port)
         self.pwd = pwd
-        self.current_token = None
+        self._token: Optional[Tuple[Tuple[str, int, str], _TokenState]] = None
         self.api_ver = api_ver
 
+    def _token_state(self) -> _TokenState:
+        # keyed on a hash, so the password isn't kept in a global
+        # the password can be changed after creation, which needs a different token
+        key = (
+            str(self.ip),
+            self.port,
+            hashlib.sha256(self.pwd.encode("utf-8")).hexdigest(),
+        )
+        if self._token is None or self._token[0] != key:
+            state = _token_states.get(key)
+            if state is None:
+                state = _token_states[key] = _TokenState()
+            self._token = (key, state)
+        return self._token[1]
+
+    @property
+    def current_token(self) -> Optional[dict]:
+        return self._token_state().token
+
+    @current_token.setter
+    def current_token(self, val: Optional[dict]) -> None:
+        self._token_state().token = val
+
     async def multicommand(self, *commands: str, allow_warning: bool = True) -> dict:
         """Creates and sends multiple commands as one command to the miner.
 
@@ -273,7 +382,7 @@ class BTMinerAPI(BaseMinerAPI):
         data = self._load_api_data(data)
 
         try:
-            data = parse_btminer_priviledge_data(self.current_token, data)
+            data = parse_btminer_priviledge_data(token_data, data)
         except Exception as e:
             logging.info(f"{str(self.ip)}: {e}")
 
@@ -296,39 +405,52 @@ class BTMinerAPI(BaseMinerAPI):
         </details>
         """
         logging.debug(f"{self} - (Get Token) - Getting token")
-        if self.current_token:
-            if self.current_token[
-                "timestamp"
-            ] > datetime.datetime.now() - datetime.timedelta(minutes=30):
-                return self.current_token
-
-        # get the token
-        data = await self.send_command("get_token")
-
-        # encrypt the admin password with the salt
-        pwd = _crypt(self.pwd, "$1$" + data["Msg"]["salt"] + "$")
-        pwd = pwd.split("$")
-
-        # take the 4th item from the pwd split
-        host_passwd_md5 = pwd[3]
-
-        # encrypt the pwd with the time and new salt
-        tmp = _crypt(pwd[3] + data["Msg"]["time"], "$1$" + data["Msg"]["newsalt"] + "$")
-        tmp = tmp.split("$")
-
-        # take the 4th item from the encrypted pwd split
-        host_sign = tmp[3]
-
-        # set the current token
-        self.current_token = {
-            "host_sign": host_sign,
-            "host_passwd_md5": host_passwd_md5,
-            "timestamp": datetime.datetime.now(),
-        }
-        logging.debug(
-            f"{self} - (Get Token) - Gathered token data: {self.current_token}"
-        )
-        return self.current_token
+        # shared by every instance for this miner, so only one refreshes the token
+        state = self._token_state()
+        if self._token_valid(state.token):
+            return state.token
+
+        if state.lock is None:
+            state.lock = asyncio.Lock()
+        async with state.lock:
+            # another command may have fetched a token while this one waited
+            if self._token_valid(state.token):
+                return state.token
+
+            # get the token
+            data = await self.send_command("get_token")
+            salt = data["Msg"]["salt"]
+            cached = state.passwd_md5
+            args = (
+                self.pwd,
+                salt,
+                data["Msg"]["time"],
+                data["Msg"]["newsalt"],
+                cached[1] if cached is not None and cached[0] == salt else None,
+            )
+            if settings.get("btminer_token_offload", False):
+                # keep the md5 crypt rounds off the event loop
+                loop = asyncio.get_running_loop()
+                token = await loop.run_in_executor(None, _derive_token, *args)
+            else:
+                token = _derive_token(*args)
+            host_passwd_md5, host_sign = token
+            state.passwd_md5 = (salt, host_passwd_md5)
+
+            # set the current token
+            state.token = {
+                "host_sign": host_sign,
+                "host_passwd_md5": host_passwd_md5,
+                "timestamp": datetime.datetime.now(),
+            }
+        logging.debug(f"{self} - (Get Token) - Gathered token data: {state.token}")
+        return state.token
+
+    @staticmethod
+    def _token_valid(token: Optional[dict]) -> bool:
+        return bool(token) and token[
+            "timestamp"
+        ] > datetime.datetime.now() - datetime.timedelta(minutes=30)
 
     #### PRIVILEGED COMMANDS ####
     # Please read the top of this file to learn
@@ -0,0 +1,114 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import re
+import time
+from typing import Dict, Hashable, Optional
+
+from pyasic import settings
+
+# errors that mean the miner doesn't know a command, rather than that it failed this time
+_INVALID_COMMAND = re.compile(
+    r"invalid (command|cmd)|unknown command|unsupported command|not supported",
+    re.IGNORECASE,
+)
+
+
+def is_invalid_command(message: Optional[str]) -> bool:
+    """Check if an API error says the command is invalid or unknown to the miner.
+
+    Busy miners, timeouts and partial replies also raise errors, but those are worth trying again.
+
+    Parameters:
+        message: The message of the error.
+
+    Returns:
+        Whether the miner rejected the command itself.
+    """
+    return message is not None and _INVALID_COMMAND.search(message) is not None
+
+
+class MulticommandCapabilities:
+    """What a miner's API is known to support when sending multicommands.
+
+    Attributes:
+        joined: Whether `command1+command2` multicommands work, or `None` if not yet known.
+        unsupported: Commands the miner rejected as invalid, and when to try each of them again.
+    """
+
+    __slots__ = ("joined", "unsupported", "expires")
+
+    def __init__(self, expires: Optional[float]):
+        self.joined: Optional[bool] = None
+        self.unsupported: Dict[str, float] = {}
+        self.expires = expires
+
+    def is_unsupported(self, command: str) -> bool:
+        retry = self.unsupported.get(command)
+        if retry is None:
+            return False
+        if time.monotonic() >= retry:
+            # probe it again, in case the miner was updated
+            del self.unsupported[command]
+            return False
+        return True
+
+    def mark_unsupported(self, command: str) -> None:
+        """Skip a command the miner rejected, until the `api_capability_retry` setting has passed."""
+        self.unsupported[command] = time.monotonic() + settings.get(
+            "api_capability_retry", 300
+        )
+
+
+class CapabilityCache:
+    """A cache of the multicommand capabilities of each miner, keyed by API type and address.
+
+    Entries expire so that a firmware update is noticed.
+
+    Parameters:
+        ttl: Seconds an entry is kept for, or `None` to use the `api_capability_ttl` setting.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self._ttl = ttl
+        self._entries: Dict[Hashable, MulticommandCapabilities] = {}
+
+    @property
+    def ttl(self) -> Optional[float]:
+        if self._ttl is not None:
+            return self._ttl
+        return settings.get("api_capability_ttl", 3600)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> MulticommandCapabilities:
+        """Get the capabilities of a miner, starting from unknown if they aren't cached or have expired."""
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is None or (entry.expires is not None and now >= entry.expires):
+            ttl = self.ttl
+            entry = MulticommandCapabilities(now + ttl if ttl is not None else None)
+            self._entries[key] = entry
+        return entry
+
+    def pop(self, key: Hashable) -> Optional[MulticommandCapabilities]:
+        return self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+capability_cache = CapabilityCache()
@@ -17,6 +17,9 @@ import asyncio
 import logging
 
 from pyasic.API import APIError, BaseMinerAPI
+from pyasic.API.capabilities import is_invalid_command
+from pyasic.API.decoding import CGMINER_REPAIRS
+from pyasic.API.registry import CGMINER_MUTATING_COMMANDS, CGMINER_PRIVILEGED_COMMANDS
 
 
 class CGMinerAPI(BaseMinerAPI):
@@ -37,6 +40,11 @@ class CGMinerAPI(BaseMinerAPI):
         port: The port to reference the API on.  Default is 4028.
     """
 
+    _api_repairs = CGMINER_REPAIRS
+    _null_terminated = True
+    _privileged_commands = CGMINER_PRIVILEGED_COMMANDS
+    _mutating_commands = CGMINER_MUTATING_COMMANDS
+
     def __init__(self, ip: str, api_ver: str = "0.0.0", port: int = 4028):
         super().__init__(ip, port)
         self.api_ver = api_ver
@@ -47,11 +55,21 @@ class CGMinerAPI(BaseMinerAPI):
         # standard multicommand format is "command1+command2"
         # doesn't work for S19 which uses the backup _x19_multicommand
         command = "+".join(commands)
-        try:
-            data = await self.send_command(command, allow_warning=allow_warning)
-        except APIError:
-            logging.debug(f"{self} - (Multicommand) - Handling X19 multicommand.")
-            data = await self._x19_multicommand(*command.split("+"))
+        capabilities = self._multicommand_capabilities()
+        if capabilities.joined is False:
+            # this firmware is known not to support it, go straight to the backup
+            data = await self._x19_multicommand(*commands)
+        else:
+            try:
+                data = await self.send_command(command, allow_warning=allow_warning)
+                if len(commands) > 1:
+                    capabilities.joined = True
+            except APIError as e:
+                logging.debug(f"{self} - (Multicommand) - Handling X19 multicommand.")
+                # only a rejected joined command means the syntax isn't supported
+                if len(commands) > 1 and is_invalid_command(e.message):
+                    capabilities.joined = False
+                data = await self._x19_multicommand(*commands)
         data["multicommand"] = True
         return data
 
@@ -0,0 +1,172 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import json
+import re
+from typing import Any, Callable, Tuple, Union
+
+from pyasic import settings
+from pyasic.errors import APIError
+
+try:
+    import orjson
+except ImportError:  # optional, install with the `fast` extra
+    orjson = None
+
+
+# repairs for known firmware bugs, each only runs if the response is not valid JSON
+def _trailing_comma(data: str) -> str:
+    # fix an error with a btminer return having an extra comma that breaks json.loads()
+    return data.replace(",}", "}")
+
+
+def _newlines(data: str) -> str:
+    # fix an error with a btminer return having a newline that breaks json.loads()
+    return data.replace("\n", "")
+
+
+def _joined_objects(data: str) -> str:
+    # fix an error with a bmminer return not having a specific comma that breaks json.loads()
+    return data.replace("}{", "},{")
+
+
+def _leading_list_comma(data: str) -> str:
+    # fix an error with a bmminer return having a specific comma that breaks json.loads()
+    return data.replace("[,{", "[{")
+
+
+def _missing_temp_comma(data: str) -> str:
+    # fix an error with a btminer return having a missing comma. (2023-01-06 version)
+    return data.replace('""temp0', '","temp0')
+
+
+_NON_FINITE = re.compile(r"(?<=[:\[,])(\s*)-?(?:inf|nan)(?=\s*[,}\]])")
+
+
+def _non_finite(data: str) -> str:
+    # fix an error with Avalonminers returning inf and nan, only where a value is expected
+    return _NON_FINITE.sub(r"\g<1>0", data)
+
+
+def _leading_comma(data: str) -> str:
+    # fix whatever this garbage from avalonminers is `,"id":1}`
+    if data.startswith(","):
+        return f"{{{data[1:]}"
+    return data
+
+
+def _truncated(data: str) -> str:
+    # try to fix an error with overflowing the receive buffer
+    # this can happen in cases such as bugged btminers returning arbitrary length error info with 100s of errors.
+    if not data.endswith("}"):
+        return ",".join(data.split(",")[:-1]) + "}"
+    return data
+
+
+def _error_code_list(data: str) -> str:
+    # fix a really nasty bug with whatsminer API v2.0.4 where they return a list structured like a dict
+    if re.search(r"\"error_code\":\[\".+\"\]", data):
+        return data.replace("[", "{").replace("]", "}")
+    return data
+
+
+Repairs = Tuple[Callable[[str], str], ...]
+
+ALL_REPAIRS: Repairs = (
+    _trailing_comma,
+    _newlines,
+    _joined_objects,
+    _leading_list_comma,
+    _missing_temp_comma,
+    _non_finite,
+    _leading_comma,
+    _truncated,
+    _error_code_list,
+)
+BMMINER_REPAIRS: Repairs = (_joined_objects, _leading_list_comma)
+CGMINER_REPAIRS: Repairs = (
+    _joined_objects,
+    _leading_list_comma,
+    _non_finite,
+    _leading_comma,
+)
+BTMINER_REPAIRS: Repairs = (
+    _trailing_comma,
+    _newlines,
+    _missing_temp_comma,
+    _truncated,
+    _error_code_list,
+)
+
+
+def _decoder() -> Callable[[Union[bytes, str]], Any]:
+    decoder = settings.get("api_json_decoder", "json")
+    if callable(decoder):
+        return decoder
+    if decoder == "orjson" or (decoder == "auto" and orjson is not None):
+        if orjson is None:
+            raise ImportError("orjson is not installed, install pyasic[fast]")
+        return orjson.loads
+    return json.loads
+
+
+def repair_api_data(data: str, repairs: Repairs = ALL_REPAIRS) -> str:
+    """Apply repairs for known firmware bugs to an API response that is not valid JSON.
+
+    Parameters:
+        data: The response, without a trailing null byte.
+        repairs: The repairs to apply, in order.
+
+    Returns:
+        The repaired response.
+    """
+    for repair in repairs:
+        data = repair(data)
+    return data
+
+
+def load_api_data(data: bytes, repairs: Repairs = ALL_REPAIRS) -> dict:
+    """Decode an API response.
+
+    The response is decoded strictly first, with the decoder chosen by the `api_json_decoder` setting. Only if that
+    fails are `repairs` applied, followed by every known repair if those were not enough.
+
+    Parameters:
+        data: The raw response.
+        repairs: The repairs for the firmware the response came from.
+
+    Returns:
+        The decoded response.
+
+    Raises:
+        APIError: If the response could not be decoded.
+    """
+    # some json from the API returns with a null byte (\x00) on the end
+    if data.endswith(b"\x00"):
+        data = data[:-1]
+    try:
+        return _decoder()(data)
+    except ValueError:
+        pass
+
+    str_data = data.decode("utf-8")
+    attempts = [repairs] if repairs == ALL_REPAIRS else [repairs, ALL_REPAIRS]
+    for attempt in attempts:
+        repaired = repair_api_data(str_data, attempt)
+        try:
+            return json.loads(repaired)
+        except json.decoder.JSONDecodeError as e:
+            error = e
+    raise APIError(f"Decode Error {error}: {repaired}")
@@ -0,0 +1,132 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from pyasic import settings
+
+_CLOSERS = (ord("}"), ord("]"))
+_WHITESPACE = b" \t\r\n"
+
+
+class ResponseBuffer:
+    """Collects a socket API response and detects when it is complete.
+
+    A response is complete once a null byte is received, once the data received is a balanced JSON document, or
+    once the miner closes the connection. Data after a null byte is dropped, and data past `max_size` is truncated.
+
+    Parameters:
+        max_size: The maximum number of bytes to keep, setting `api_max_response_size`.
+        balanced_json: Whether a balanced JSON document completes the response. Turn this off for firmware that
+            ends every response with a null byte, where a multicommand response can be several JSON objects in a row.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, balanced_json: bool = True):
+        if max_size is None:
+            max_size = settings.get("api_max_response_size", 1048576)
+        self.max_size = max_size
+        self.balanced_json = balanced_json
+        self.data = bytearray()
+        self.complete = False
+        self.truncated = False
+        # running bracket counts, a cheap check before trying to decode
+        self._opened = 0
+        self._closed = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def feed(self, chunk: bytes) -> bool:
+        """Add received data to the response.
+
+        Parameters:
+            chunk: The data received, where an empty chunk means the connection was closed.
+
+        Returns:
+            Whether the response is complete.
+        """
+        if self.complete:
+            return True
+        if not chunk:
+            self.complete = True
+            return True
+
+        end = chunk.find(b"\x00")
+        if end != -1:
+            # keep the null byte, the parsers expect it
+            chunk = chunk[: end + 1]
+            self.complete = True
+
+        space = self.max_size - len(self.data)
+        if len(chunk) > space:
+            chunk = chunk[:space]
+            self.truncated = True
+            self.complete = True
+        self.data += chunk
+
+        if not self.complete and self.balanced_json:
+            self._opened += chunk.count(b"{") + chunk.count(b"[")
+            self._closed += chunk.count(b"}") + chunk.count(b"]")
+            if self._opened and self._opened == self._closed:
+                self.complete = self._is_json()
+        return self.complete
+
+    def _is_json(self) -> bool:
+        stripped = self.data.rstrip(_WHITESPACE)
+        if not stripped or stripped[-1] not in _CLOSERS:
+            return False
+        try:
+            json.loads(stripped)
+        except ValueError:
+            # a brace inside a string, or malformed JSON that is repaired later, wait for the miner to finish
+            return False
+        return True
+
+
+async def read_response(
+    reader: asyncio.StreamReader,
+    timeout: Optional[float] = None,
+    max_size: Optional[int] = None,
+    buffer: Optional[ResponseBuffer] = None,
+) -> bytes:
+    """Read a socket API response, returning as soon as it is complete instead of waiting for the connection to close.
+
+    Parameters:
+        reader: The stream to read from.
+        timeout: The seconds to wait for each read, or `None` to wait indefinitely.
+        max_size: The maximum number of bytes to read, setting `api_max_response_size`.
+        buffer: An optional buffer already holding the start of the response.
+
+    Returns:
+        The response, which is empty if the connection was closed without one.
+
+    Raises:
+        asyncio.TimeoutError: If a read takes longer than `timeout`.
+    """
+    if buffer is None:
+        buffer = ResponseBuffer(max_size=max_size)
+    while not buffer.complete:
+        size = min(65536, max(buffer.max_size - len(buffer), 1))
+        if timeout is None:
+            chunk = await reader.read(size)
+        else:
+            chunk = await asyncio.wait_for(reader.read(size), timeout=timeout)
+        buffer.feed(chunk)
+    if buffer.truncated:
+        logging.warning(f"Truncated an API response at {buffer.max_size} bytes.")
+    return bytes(buffer.data)
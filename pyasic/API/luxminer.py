@@ -36,6 +36,55 @@ class LUXMinerAPI(BaseMinerAPI):
         port: The port to reference the API on.  Default is 4028.
     """
 
+    # commands that need a session from logon
+    _privileged_commands = frozenset(
+        {
+            "curtail",
+            "fanset",
+            "frequencyset",
+            "frequencystop",
+            "healthchipset",
+            "healthctrlset",
+            "ledset",
+            "logoff",
+            "profileset",
+            "reboot",
+            "rebootdevice",
+            "resetminer",
+            "voltageset",
+            "wakeup",
+        }
+    )
+    _mutating_commands = frozenset(
+        {
+            "addgroup",
+            "addpool",
+            "curtail",
+            "disablepool",
+            "enablepool",
+            "fanset",
+            "frequencyset",
+            "frequencystop",
+            "groupquota",
+            "healthchipset",
+            "healthctrlset",
+            "kill",
+            "ledset",
+            "logoff",
+            "logon",
+            "profileset",
+            "reboot",
+            "rebootdevice",
+            "removegroup",
+            "removepool",
+            "resetminer",
+            "switchpool",
+            "tempctrlset",
+            "voltageset",
+            "wakeup",
+        }
+    )
+
     def __init__(self, ip: str, api_ver: str = "0.0.0", port: int = 4028) -> None:
         super().__init__(ip, port=port)
         self.api_ver = api_ver
@@ -0,0 +1,142 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import FrozenSet, Iterable, Iterator, Mapping, Optional
+
+# commands of the cgminer style APIs that need write access to the API
+CGMINER_PRIVILEGED_COMMANDS = frozenset(
+    {
+        "addpool",
+        "ascdisable",
+        "ascenable",
+        "ascidentify",
+        "ascset",
+        "debug",
+        "disablepool",
+        "enablepool",
+        "failover_only",
+        "hotplug",
+        "lockstats",
+        "pgadisable",
+        "pgaenable",
+        "pgaidentify",
+        "pgaset",
+        "poolpriority",
+        "poolquota",
+        "quit",
+        "removepool",
+        "restart",
+        "save",
+        "setconfig",
+        "switchpool",
+        "zero",
+    }
+)
+# lockstats only writes the lock stats to the log
+CGMINER_MUTATING_COMMANDS = CGMINER_PRIVILEGED_COMMANDS - {"lockstats"}
+
+
+@dataclass(frozen=True)
+class CommandInfo:
+    """Details of a command of an API.
+
+    Attributes:
+        name: The name of the command, which is also the name of its method.
+        privileged: Whether the command needs privileged access, such as a BTMiner token or cgminer write access.
+        read_only: Whether the command only reads data, rather than changing the state of the miner.
+        min_api_version: The minimum API version the command needs, if any.
+    """
+
+    name: str
+    privileged: bool = False
+    read_only: bool = True
+    min_api_version: Optional[str] = None
+
+
+class CommandRegistry(Mapping):
+    """An immutable mapping of the command names of an API class to their [`CommandInfo`][pyasic.API.registry.CommandInfo].
+
+    Registries are built once per class, so checking if a command exists is a set lookup.
+
+    Parameters:
+        commands: The commands to register.
+    """
+
+    def __init__(self, commands: Iterable[CommandInfo]):
+        self._commands = MappingProxyType({info.name: info for info in commands})
+        self.names: FrozenSet[str] = frozenset(self._commands)
+
+    def __getitem__(self, name: str) -> CommandInfo:
+        return self._commands[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._commands)
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def __contains__(self, name) -> bool:
+        return name in self.names
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({list(self._commands)})"
+
+    @property
+    def privileged(self) -> FrozenSet[str]:
+        return frozenset(name for name, info in self.items() if info.privileged)
+
+    @property
+    def mutating(self) -> FrozenSet[str]:
+        return frozenset(name for name, info in self.items() if not info.read_only)
+
+    @property
+    def read_only(self) -> FrozenSet[str]:
+        return frozenset(name for name, info in self.items() if info.read_only)
+
+
+def build_command_registry(cls: type, base: type) -> CommandRegistry:
+    """Find the commands of an API class, the public methods it has that `base` does not.
+
+    Metadata is read from the `_privileged_commands` and `_mutating_commands` sets of the class, and from the
+    [`api_min_version`][pyasic.misc.api_min_version] decorator of each method.
+
+    Parameters:
+        cls: The API class.
+        base: The base class of the API, such as [`BaseMinerAPI`][pyasic.API.BaseMinerAPI].
+
+    Returns:
+        The registry of commands of the class, in alphabetical order.
+    """
+    base_methods = {name for name in dir(base) if callable(getattr(base, name))}
+    privileged = getattr(cls, "_privileged_commands", frozenset())
+    mutating = getattr(cls, "_mutating_commands", frozenset())
+    commands = []
+    for name in dir(cls):
+        if name.startswith("_") or name == "commands" or name in base_methods:
+            continue
+        method = getattr(cls, name)
+        if not callable(method):
+            continue
+        commands.append(
+            CommandInfo(
+                name,
+                privileged=name in privileged,
+                read_only=name not in mutating,
+                min_api_version=getattr(method, "min_api_version", None),
+            )
+        )
+    return CommandRegistry(commands)
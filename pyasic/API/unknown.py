@@ -25,6 +25,11 @@ class UnknownAPI(BaseMinerAPI):
     with as many APIs as possible.
     """
 
+    _privileged_commands = frozenset(
+        {"addpool", "disablepool", "enablepool", "removepool", "switchpool"}
+    )
+    _mutating_commands = _privileged_commands
+
     def __init__(self, ip, api_ver: str = "0.0.0", port: int = 4028):
         super().__init__(ip, port)
         self.api_ver = api_ver
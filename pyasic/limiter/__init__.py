@@ -0,0 +1,104 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, FrozenSet, Optional
+
+from pyasic import settings
+
+# hosts the current task already holds a connection slot for
+_held: ContextVar[FrozenSet[str]] = ContextVar("host_limiter_held", default=frozenset())
+
+
+class _HostSlots:
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        # tasks holding or waiting for a slot, the slots are dropped once this is 0
+        self.users = 0
+
+
+class HostLimiter:
+    """Limits how many connections are open to each miner at once.
+
+    The socket API, web, gRPC and SSH clients of a miner all share the slots of its IP, so parallel commands queue
+    instead of overloading the control board. A connection made while the same task already holds a slot for the IP,
+    such as a login inside a web request, doesn't take another one.
+
+    The limit of an IP is the `host_connection_limits` setting for the make of the miner, such as `"WhatsMiner"`,
+    or the `host_connection_limit` setting otherwise. A limit of `None` or `0` means no limit, which is the default.
+    The limit is looked up when the first connection to an idle IP is made, and nothing is kept for IPs without
+    open connections.
+    """
+
+    def __init__(self):
+        self._hosts: Dict[str, _HostSlots] = {}
+        self.waits = 0
+
+    @staticmethod
+    def limit(vendor: Optional[str] = None) -> Optional[int]:
+        """Get the maximum number of connections to a miner, or `None` if there is no limit.
+
+        Parameters:
+            vendor: The make of the miner, such as `"WhatsMiner"`, if it is known.
+        """
+        limits = settings.get("host_connection_limits", None) or {}
+        if vendor in limits:
+            return limits[vendor] or None
+        return settings.get("host_connection_limit", None) or None
+
+    @asynccontextmanager
+    async def connection(
+        self, ip: str, vendor: Optional[str] = None
+    ) -> AsyncIterator[None]:
+        """Hold a connection slot for an IP for the duration of the `async with` block.
+
+        Parameters:
+            ip: The IP address being connected to.
+            vendor: The make of the miner, which picks its limit from `host_connection_limits`.
+        """
+        ip = str(ip)
+        held = _held.get()
+        if ip in held:
+            yield
+            return
+
+        slots = self._hosts.get(ip)
+        if slots is None:
+            limit = self.limit(vendor)
+            if limit is None:
+                yield
+                return
+            slots = self._hosts[ip] = _HostSlots(limit)
+        slots.users += 1
+        try:
+            if slots.semaphore.locked():
+                self.waits += 1
+            async with slots.semaphore:
+                token = _held.set(held | {ip})
+                try:
+                    yield
+                finally:
+                    _held.reset(token)
+        finally:
+            slots.users -= 1
+            if slots.users == 0:
+                del self._hosts[ip]
+
+
+host_limiter = HostLimiter()
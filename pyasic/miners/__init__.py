@@ -15,12 +15,14 @@
 # ------------------------------------------------------------------------------
 
 import ipaddress
-from typing import Union
+from typing import Optional, Union
 
 from pyasic.miners.base import AnyMiner, BaseMiner
 from pyasic.miners.miner_factory import miner_factory
 
 
 # abstracted version of get miner that is easier to access
-async def get_miner(ip: Union[ipaddress.ip_address, str]) -> AnyMiner:
-    return await miner_factory.get_miner(ip)
+async def get_miner(
+    ip: Union[ipaddress.ip_address, str], mac: Optional[str] = None
+) -> AnyMiner:
+    return await miner_factory.get_miner(ip, mac=mac)
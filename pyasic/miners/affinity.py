@@ -0,0 +1,101 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import ipaddress
+from typing import Dict, Optional, Tuple
+
+
+class _HitCounter:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        # seconds spent on hits, and on full identifications
+        self.fast_time = 0.0
+        self.full_time = 0.0
+        self.full_count = 0
+
+    def hit(self, seconds: float) -> None:
+        self.hits += 1
+        self.fast_time += seconds
+
+    def miss(self) -> None:
+        self.misses += 1
+
+    def full(self, seconds: float) -> None:
+        self.full_time += seconds
+        self.full_count += 1
+
+    def as_dict(self) -> dict:
+        total = self.hits + self.misses
+        saved = None
+        if self.hits and self.full_count:
+            full_mean = self.full_time / self.full_count
+            saved = max(0.0, self.hits * full_mean - self.fast_time)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else None,
+            "time_saved": saved,
+        }
+
+
+class SubnetAffinity:
+    """Learns, per subnet, which miner type and model lookup identified the last miner found in it.
+
+    Subnets are usually filled with the same kind of miner, so the next host in the subnet is first checked
+    with the single cheapest request for that miner type, and its model is first looked up with the same
+    lookup that worked before. A miss falls back to full identification.
+
+    Parameters:
+        prefix: The prefix length that defines a subnet, such as `24`.
+    """
+
+    def __init__(self, prefix: int = 24):
+        self.prefix = prefix
+        # subnet key -> (miner type name, model lookup name)
+        self.subnets: Dict[Tuple[int, int], Tuple[str, Optional[str]]] = {}
+        self.types = _HitCounter()
+        self.models = _HitCounter()
+
+    def __len__(self):
+        return len(self.subnets)
+
+    def _key(self, ip: str) -> Tuple[int, int]:
+        ip = ipaddress.ip_address(ip)
+        return (ip.version, int(ip) >> (ip.max_prefixlen - self.prefix))
+
+    def miner_type(self, ip: str) -> Optional[str]:
+        """Get the name of the [`MinerTypes`][pyasic.miners.miner_factory.MinerTypes] member last identified in the subnet of an IP."""
+        learned = self.subnets.get(self._key(ip))
+        return learned[0] if learned is not None else None
+
+    def model_lookup(self, ip: str, miner_type: str) -> Optional[str]:
+        """Get the name of the model lookup that last worked in the subnet of an IP, for miners of `miner_type`."""
+        learned = self.subnets.get(self._key(ip))
+        if learned is None or learned[0] != miner_type:
+            return None
+        return learned[1]
+
+    def learn(self, ip: str, miner_type: str, model_lookup: Optional[str]) -> None:
+        self.subnets[self._key(ip)] = (miner_type, model_lookup)
+
+    @property
+    def stats(self) -> dict:
+        """Hit rates of the learned miner types and model lookups, and an estimate of the seconds they saved."""
+        return {
+            "subnets": len(self.subnets),
+            "type": self.types.as_dict(),
+            "model": self.models.as_dict(),
+        }
@@ -24,6 +24,7 @@ import asyncssh
 from pyasic.config import MinerConfig
 from pyasic.data import Fan, HashBoard, MinerData
 from pyasic.data.error_codes import MinerErrorData
+from pyasic.limiter import host_limiter
 from pyasic.logger import logger
 
 
@@ -103,6 +104,38 @@ class BaseMiner(ABC):
         except TypeError:
             pass
 
+    @property
+    def make(self):  # noqa - Skip PyCharm inspection
+        return self._make
+
+    @make.setter
+    def make(self, val):
+        self._make = val
+        # the make picks the connection limit of the miner's clients
+        for client in (self.api, self.web):
+            if client is not None:
+                client.vendor = val
+
+    @property
+    def api(self):  # noqa - Skip PyCharm inspection
+        return self._api
+
+    @api.setter
+    def api(self, val):
+        self._api = val
+        if val is not None:
+            val.vendor = getattr(self, "_make", None)
+
+    @property
+    def web(self):  # noqa - Skip PyCharm inspection
+        return self._web
+
+    @web.setter
+    def web(self, val):
+        self._web = val
+        if val is not None:
+            val.vendor = getattr(self, "_make", None)
+
     @property
     def username(self):  # noqa - Skip PyCharm inspection
         data = []
@@ -123,32 +156,34 @@ class BaseMiner(ABC):
 
     async def _get_ssh_connection(self) -> asyncssh.connect:
         """Create a new asyncssh connection"""
-        try:
-            conn = await asyncssh.connect(
-                str(self.ip),
-                known_hosts=None,
-                username="root",
-                password=self.ssh_pwd,
-                server_host_key_algs=["ssh-rsa"],
-            )
-            return conn
-        except asyncssh.misc.PermissionDenied:
+        # only the handshake holds a connection slot, the session is used by the caller
+        async with host_limiter.connection(self.ip, self.make):
             try:
                 conn = await asyncssh.connect(
                     str(self.ip),
                     known_hosts=None,
                     username="root",
-                    password="admin",
+                    password=self.ssh_pwd,
                     server_host_key_algs=["ssh-rsa"],
                 )
                 return conn
+            except asyncssh.misc.PermissionDenied:
+                try:
+                    conn = await asyncssh.connect(
+                        str(self.ip),
+                        known_hosts=None,
+                        username="root",
+                        password="admin",
+                        server_host_key_algs=["ssh-rsa"],
+                    )
+                    return conn
+                except Exception as e:
+                    raise ConnectionError from e
+            except OSError as e:
+                logging.warning(f"Connection refused: {self}")
+                raise ConnectionError from e
             except Exception as e:
                 raise ConnectionError from e
-        except OSError as e:
-            logging.warning(f"Connection refused: {self}")
-            raise ConnectionError from e
-        except Exception as e:
-            raise ConnectionError from e
 
     async def check_light(self) -> bool:
         return await self.get_fault_light()
@@ -0,0 +1,182 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from pyasic import settings
+from pyasic.miners.base import AnyMiner
+
+
+class _CacheEntry:
+    __slots__ = ("miner", "expires", "failures")
+
+    def __init__(self, miner: Optional[AnyMiner], expires: Optional[float]):
+        self.miner = miner
+        self.expires = expires
+        # consecutive failed identifications, 0 for a miner
+        self.failures = 0
+
+
+class MinerCache:
+    """A bounded cache of identified miners, with expiry and caching of failed identifications.
+
+    Entries are evicted least recently used first once the cache is full, and expire after a time to live.
+    Hosts that failed identification are cached as `None` for a shorter time, which doubles with each consecutive
+    failure, so polling a dead host doesn't wait out the identification timeout every time.
+
+    Options that are `None` use the settings of the same name.
+
+    Parameters:
+        max_size: The maximum number of entries, setting `factory_cache_size`.
+        ttl: Seconds an identified miner is cached for, or `None` to never expire, setting `factory_cache_ttl`.
+        negative_ttl: Seconds a failed identification is cached for at first, setting `factory_cache_negative_ttl`.
+        max_negative_ttl: The longest a failed identification is cached for, setting `factory_cache_max_negative_ttl`.
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        ttl: Optional[float] = None,
+        negative_ttl: Optional[float] = None,
+        max_negative_ttl: Optional[float] = None,
+    ):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._max_negative_ttl = max_negative_ttl
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is not None:
+            return self._max_size
+        return settings.get("factory_cache_size", 65536)
+
+    @property
+    def ttl(self) -> Optional[float]:
+        if self._ttl is not None:
+            return self._ttl
+        return settings.get("factory_cache_ttl", 3600)
+
+    @property
+    def negative_ttl(self) -> float:
+        if self._negative_ttl is not None:
+            return self._negative_ttl
+        return settings.get("factory_cache_negative_ttl", 30)
+
+    @property
+    def max_negative_ttl(self) -> float:
+        if self._max_negative_ttl is not None:
+            return self._max_negative_ttl
+        return settings.get("factory_cache_max_negative_ttl", 600)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, ip) -> bool:
+        return self._get_entry(str(ip)) is not None
+
+    def __getitem__(self, ip) -> Optional[AnyMiner]:
+        """Get a cached miner, or `None` for a cached failure.
+
+        Raises:
+            KeyError: If the IP is not cached, or its entry expired.
+        """
+        ip = str(ip)
+        entry = self._get_entry(ip)
+        if entry is None:
+            self.misses += 1
+            raise KeyError(ip)
+        self._entries.move_to_end(ip)
+        if entry.miner is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return entry.miner
+
+    def __setitem__(self, ip, miner: AnyMiner) -> None:
+        self.set(ip, miner)
+
+    def get(self, ip, default=None) -> Optional[AnyMiner]:
+        try:
+            return self[ip]
+        except KeyError:
+            return default
+
+    def set(self, ip, miner: AnyMiner) -> None:
+        """Cache an identified miner, clearing any failures of the IP."""
+        ttl = self.ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        self._put(str(ip), _CacheEntry(miner, expires))
+
+    def set_failed(self, ip) -> None:
+        """Cache a failed identification, backing off exponentially on consecutive failures."""
+        ip = str(ip)
+        previous = self._entries.get(ip)
+        failures = 1
+        if previous is not None and previous.miner is None:
+            failures = previous.failures + 1
+        ttl = min(self.negative_ttl * 2 ** min(failures - 1, 32), self.max_negative_ttl)
+        entry = _CacheEntry(None, time.monotonic() + ttl)
+        entry.failures = failures
+        self._put(ip, entry)
+
+    def pop(self, ip, default=None) -> Optional[AnyMiner]:
+        entry = self._entries.pop(str(ip), None)
+        return entry.miner if entry is not None else default
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits + self.negative_hits) / lookups if lookups else None,
+        }
+
+    def _get_entry(self, ip: str) -> Optional[_CacheEntry]:
+        entry = self._entries.get(ip)
+        if entry is None:
+            return None
+        if entry.expires is not None and time.monotonic() >= entry.expires:
+            if entry.miner is not None:
+                del self._entries[ip]
+                self.expirations += 1
+            # expired failures are kept to back off from, but are not hits
+            return None
+        return entry
+
+    def _put(self, ip: str, entry: _CacheEntry) -> None:
+        self._entries[ip] = entry
+        self._entries.move_to_end(ip)
+        max_size = self.max_size
+        while len(self._entries) > max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,115 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+
+@dataclass
+class Signature:
+    """A string that identifies a miner type when found in a response.
+
+    Attributes:
+        pattern: The string to search for.
+        result: The value returned when the signature matches, such as a [`MinerTypes`][pyasic.miners.miner_factory.MinerTypes] member.
+        priority: Signatures with a lower priority win when several match. Ties go to the first registered.
+        unless: An optional string that stops this signature from matching if it is also in the response.
+    """
+
+    pattern: str
+    result: Any
+    priority: int = 0
+    unless: Optional[str] = None
+
+
+class SignatureRegistry:
+    """A set of signatures, compiled into a single ordered plan that is run over each response.
+
+    The plan is rebuilt only when signatures change. Signatures are checked from the lowest priority up, and the first
+    match wins, so a response is only scanned as far as needed.
+
+    Parameters:
+        ignore_case: Whether signatures match regardless of case.
+    """
+
+    def __init__(self, ignore_case: bool = False):
+        self.ignore_case = ignore_case
+        self.signatures: List[Signature] = []
+        # (pattern, unless, result) in the order they are checked
+        self._plan: Optional[Tuple[Tuple[str, Optional[str], Any], ...]] = None
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def register(
+        self,
+        pattern: str,
+        result: Any,
+        priority: int = 0,
+        unless: Optional[str] = None,
+    ) -> Signature:
+        """Add a signature.
+
+        Parameters:
+            pattern: The string to search for.
+            result: The value to return when the signature matches.
+            priority: Signatures with a lower priority win when several match. Ties go to the first registered.
+            unless: An optional string that stops this signature from matching if it is also in the response.
+
+        Returns:
+            The registered [`Signature`][pyasic.miners.fingerprint.Signature].
+        """
+        signature = Signature(pattern, result, priority=priority, unless=unless)
+        self.signatures.append(signature)
+        self._plan = None
+        return signature
+
+    def unregister(self, signature: Signature) -> None:
+        self.signatures.remove(signature)
+        self._plan = None
+
+    def _compile(self) -> Tuple[Tuple[str, Optional[str], Any], ...]:
+        # sorted() is stable, so ties keep their registration order
+        self._plan = tuple(
+            (
+                self._normalize(signature.pattern),
+                self._normalize(signature.unless)
+                if signature.unless is not None
+                else None,
+                signature.result,
+            )
+            for signature in sorted(self.signatures, key=lambda sig: sig.priority)
+        )
+        return self._plan
+
+    def _normalize(self, string: str) -> str:
+        return string.upper() if self.ignore_case else string
+
+    def match(self, text: str) -> Any:
+        """Scan a response for signatures.
+
+        Parameters:
+            text: The response to scan.
+
+        Returns:
+            The result of the matching signature with the lowest priority, or `None` if none match.
+        """
+        plan = self._plan if self._plan is not None else self._compile()
+        if self.ignore_case:
+            text = text.upper()
+        for pattern, unless, result in plan:
+            if pattern in text and (unless is None or unless not in text):
+                return result
+        return None
@@ -0,0 +1,132 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from pyasic.logger import logger
+
+
+@dataclass
+class InventoryEntry:
+    """A Dataclass to store what is known about an identified miner.
+
+    Attributes:
+        ip: The IP address of the miner.
+        miner_type: The name of the [`MinerTypes`][pyasic.miners.miner_factory.MinerTypes] the miner was identified as.
+        model: The model of the miner, if it could be found.
+        firmware: The API type of the miner class that was selected, such as `"BMMiner"` or `"BOSMiner"`.
+        boser: Whether a Braiins OS miner supports the gRPC API.
+        mac: The MAC address of the miner, if it is known.
+        last_seen: The unix timestamp of the last time the miner was identified or verified.
+    """
+
+    ip: str
+    miner_type: str
+    model: Optional[str] = None
+    firmware: Optional[str] = None
+    boser: Optional[bool] = None
+    mac: Optional[str] = None
+    last_seen: float = 0.0
+
+
+class MinerInventory:
+    """A persistent store of identified miners, used by [`MinerFactory`][pyasic.miners.miner_factory.MinerFactory] to skip full identification of known hosts.
+
+    Parameters:
+        path: The JSON file to load the inventory from and save it to. If `None`, the inventory is only kept in memory.
+        max_age: How long in seconds an entry is trusted after it was last seen. If `None`, entries never expire.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self, path: Union[str, Path, None] = None, max_age: Optional[float] = None
+    ):
+        self.path = Path(path) if path is not None else None
+        self.max_age = max_age
+        self.entries: Dict[str, InventoryEntry] = {}
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, ip):
+        return self.get(ip) is not None
+
+    def get(self, ip: str) -> Optional[InventoryEntry]:
+        entry = self.entries.get(str(ip))
+        if entry is None:
+            return None
+        if self.max_age is not None and time.time() - entry.last_seen > self.max_age:
+            return None
+        return entry
+
+    def update(self, ip: str, **kwargs) -> InventoryEntry:
+        """Add or update the entry for a miner, and mark it as seen now.
+
+        Parameters:
+            ip: The IP address of the miner.
+            **kwargs: Any [`InventoryEntry`][pyasic.miners.inventory.InventoryEntry] fields to set.
+        """
+        ip = str(ip)
+        entry = self.entries.get(ip)
+        if entry is None:
+            entry = InventoryEntry(ip=ip, miner_type=kwargs.pop("miner_type"))
+            self.entries[ip] = entry
+        for key, val in kwargs.items():
+            setattr(entry, key, val)
+        entry.last_seen = time.time()
+        return entry
+
+    def remove(self, ip: str) -> None:
+        self.entries.pop(str(ip), None)
+
+    def clear(self) -> None:
+        self.entries = {}
+
+    def load(self) -> None:
+        """Load the inventory from `path`, replacing any entries in memory."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Failed to load miner inventory from {self.path}: {e}")
+            return
+        if data.get("version") != self.VERSION:
+            return
+        names = {f.name for f in fields(InventoryEntry)}
+        self.entries = {
+            ip: InventoryEntry(**{k: v for k, v in entry.items() if k in names})
+            for ip, entry in data.get("miners", {}).items()
+        }
+
+    def save(self) -> None:
+        """Save the inventory to `path`, replacing the file atomically."""
+        if self.path is None:
+            return
+        data = {
+            "version": self.VERSION,
+            "miners": {ip: asdict(entry) for ip, entry in self.entries.items()},
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
@@ -17,14 +17,32 @@ import asyncio
 import enum
 import ipaddress
 import json
-import re
-from typing import AsyncGenerator, Callable, List, Optional, Tuple, Union
+import time
+from contextvars import ContextVar
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import (
+    AsyncGenerator,
+    AsyncIterable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import anyio
 import httpx
 
 from pyasic import settings
+from pyasic.API.decoding import load_api_data
+from pyasic.API.framing import read_response
+from pyasic.errors import APIError
 from pyasic.logger import logger
+from pyasic.miners.affinity import SubnetAffinity
 from pyasic.miners.antminer import *
 from pyasic.miners.avalonminer import *
 from pyasic.miners.backends import (
@@ -40,8 +58,12 @@ from pyasic.miners.backends import (
     ePIC,
 )
 from pyasic.miners.base import AnyMiner
+from pyasic.miners.cache import MinerCache
+from pyasic.miners.fingerprint import SignatureRegistry
 from pyasic.miners.goldshell import *
 from pyasic.miners.innosilicon import *
+from pyasic.miners.inventory import InventoryEntry, MinerInventory
+from pyasic.miners.oui import OUITable
 from pyasic.miners.unknown import UnknownMiner
 from pyasic.miners.whatsminer import *
 
@@ -395,6 +417,80 @@ MINER_CLASSES = {
 }
 
 
+# strings in the page served on / that identify a miner type, checked in order
+WEB_SIGNATURES = SignatureRegistry()
+WEB_SIGNATURES.register("Braiins OS", MinerTypes.BRAIINS_OS)
+WEB_SIGNATURES.register("cloud-box", MinerTypes.GOLDSHELL)
+WEB_SIGNATURES.register("AnthillOS", MinerTypes.VNISH)
+WEB_SIGNATURES.register("Miner Web Dashboard", MinerTypes.EPIC)
+WEB_SIGNATURES.register("Avalon", MinerTypes.AVALONMINER)
+WEB_SIGNATURES.register("DragonMint", MinerTypes.INNOSILICON)
+
+# strings in a `version` or `devdetails` API response that identify a miner type, checked in order
+SOCKET_SIGNATURES = SignatureRegistry(ignore_case=True)
+SOCKET_SIGNATURES.register("BOSMINER", MinerTypes.BRAIINS_OS)
+SOCKET_SIGNATURES.register("BOSER", MinerTypes.BRAIINS_OS)
+SOCKET_SIGNATURES.register("BTMINER", MinerTypes.WHATSMINER)
+SOCKET_SIGNATURES.register("BITMICRO", MinerTypes.WHATSMINER)
+SOCKET_SIGNATURES.register("VNISH", MinerTypes.VNISH)
+SOCKET_SIGNATURES.register("HIVEON", MinerTypes.HIVEON)
+SOCKET_SIGNATURES.register("LUXMINER", MinerTypes.LUX_OS)
+SOCKET_SIGNATURES.register("ANTMINER", MinerTypes.ANTMINER, unless="DEVDETAILS")
+SOCKET_SIGNATURES.register("INTCHAINS_QOMO", MinerTypes.GOLDSHELL)
+SOCKET_SIGNATURES.register("AVALON", MinerTypes.AVALONMINER)
+
+
+# miner types that can't be recognized from the `version` API command
+WEB_VERIFIED_TYPES = [
+    MinerTypes.GOLDSHELL,
+    MinerTypes.EPIC,
+    MinerTypes.INNOSILICON,
+]
+
+
+# model lookups that get_miner_model_* races, which can also be tried on their own
+MODEL_LOOKUPS = {
+    MinerTypes.ANTMINER: ["_get_model_antminer_sock", "_get_model_antminer_web"],
+}
+
+# the API command a model lookup reads first, if it can be answered from identification responses
+MODEL_LOOKUP_COMMANDS = {
+    "_get_model_antminer_sock": "version",
+}
+
+
+# receives (phase, seconds) timings of identification phases, such as "type" or "model"
+phase_timer: ContextVar[Optional[Callable[[str, float], None]]] = ContextVar(
+    "phase_timer", default=None
+)
+
+
+def record_phase(phase: str, start: float) -> None:
+    """Report how long a phase took to the `phase_timer` of the current context, if one is set.
+
+    Parameters:
+        phase: The name of the phase.
+        start: The `time.monotonic()` value when the phase started.
+    """
+    timer = phase_timer.get()
+    if timer is not None:
+        timer(phase, time.monotonic() - start)
+
+
+class _Identification:
+    # responses fetched while identifying one miner, so each is only requested once
+    def __init__(self):
+        self.socket: Dict[str, bytes] = {}
+        self.web: Dict[str, Tuple[str, httpx.Response]] = {}
+        self.connections = 0
+
+
+# the identification running in the current context
+_identification: ContextVar[Optional[_Identification]] = ContextVar(
+    "_identification", default=None
+)
+
+
 async def concurrent_get_first_result(tasks: list, verification_func: Callable):
     res = None
     for fut in asyncio.as_completed(tasks):
@@ -411,15 +507,123 @@ async def concurrent_get_first_result(tasks: list, verification_func: Callable):
 
 
 class MinerFactory:
-    def __init__(self):
-        self.cache = {}
+    """A factory to identify miners and create the correct miner class for them.
+
+    Parameters:
+        inventory: An optional [`MinerInventory`][pyasic.miners.inventory.MinerInventory] of known miners.
+            Known miners are verified with a single request instead of being fully identified.
+        oui: An optional [`OUITable`][pyasic.miners.oui.OUITable] of MAC address prefixes to miner types.
+            Miners with a known MAC address are first checked with the single cheapest probe for their likely type.
+            The table also learns from the MAC addresses stored in `inventory`.
+        affinity: An optional [`SubnetAffinity`][pyasic.miners.affinity.SubnetAffinity] to learn the miner type and model lookup of each subnet with.
+            Used while the `factory_subnet_affinity` setting is enabled. Its hit rates are in `affinity.stats`.
+        cache: An optional [`MinerCache`][pyasic.miners.cache.MinerCache] of identified miners and failed identifications.
+    """
+
+    def __init__(
+        self,
+        inventory: MinerInventory = None,
+        oui: OUITable = None,
+        affinity: SubnetAffinity = None,
+        cache: MinerCache = None,
+    ):
+        self.cache = cache if cache is not None else MinerCache()
+        self.inventory = inventory
+        self.oui = oui if oui is not None else OUITable()
+        if inventory is not None:
+            for entry in inventory.entries.values():
+                if entry.mac is not None:
+                    self.oui.learn(entry.mac, entry.miner_type)
+        self.affinity = affinity if affinity is not None else SubnetAffinity()
+        self.identified = 0
+        self.identify_connections = 0
+        self._web_client: Optional[httpx.AsyncClient] = None
+        self._web_client_loop = None
+        self._closing: Set[asyncio.Task] = set()
+
+    async def __aenter__(self) -> "MinerFactory":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    def web_client(self) -> httpx.AsyncClient:
+        """Get the HTTP client shared by all web requests made while identifying miners.
+
+        The client and its connection pool are created on first use, tuned by the `factory_web_max_connections`,
+        `factory_web_max_keepalive` and `factory_web_keepalive_expiry` settings, and kept until
+        [`close()`][pyasic.miners.miner_factory.MinerFactory.close] is called.
+        Using the factory as an async context manager closes the client on exit.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._web_client
+        # a pool can't be used from a different event loop than it was created in
+        if client is None or client.is_closed or self._web_client_loop is not loop:
+            if client is not None and not client.is_closed:
+                # close the pool of the old loop in the background, so its connections aren't leaked
+                task = loop.create_task(self._close_web_client(client))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+            limits = httpx.Limits(
+                max_connections=settings.get("factory_web_max_connections", 1000),
+                max_keepalive_connections=settings.get(
+                    "factory_web_max_keepalive", 100
+                ),
+                keepalive_expiry=settings.get("factory_web_keepalive_expiry", 5),
+            )
+            client = httpx.AsyncClient(
+                transport=settings.transport(verify=False, limits=limits),
+                timeout=settings.get("factory_get_timeout", 3),
+                # the client is shared by every miner, so don't keep cookies between them
+                cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+            )
+            self._web_client = client
+            self._web_client_loop = loop
+        return client
+
+    async def close(self) -> None:
+        """Close the shared HTTP client and its connections."""
+        client = self._web_client
+        self._web_client = None
+        self._web_client_loop = None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+        if self._closing:
+            await asyncio.gather(*self._closing)
+
+    @staticmethod
+    async def _close_web_client(client: httpx.AsyncClient) -> None:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.debug(f"Failed to close a stale web client: {e}")
+
+    @property
+    def identify_stats(self) -> dict:
+        """The number of miners identified, and the connections made to identify them."""
+        return {
+            "identified": self.identified,
+            "connections": self.identify_connections,
+            "connections_per_miner": (
+                self.identify_connections / self.identified if self.identified else None
+            ),
+        }
 
     def clear_cached_miners(self):
-        self.cache = {}
+        self.cache.clear()
 
     async def get_multiple_miners(
-        self, ips: List[str], limit: int = 200
+        self, ips: Union[Iterable[str], AsyncIterable[str]], limit: int = 200
     ) -> List[AnyMiner]:
+        """Identify multiple miners.
+
+        Parameters:
+            ips: The IP addresses of the miners, as an iterable or an async iterable.
+            limit: The maximum number of miners to identify at once.
+
+        Returns:
+            A list of identified miners, in the order they were identified.
+        """
         results = []
 
         async for miner in self.get_miner_generator(ips, limit):
@@ -427,27 +631,135 @@ class MinerFactory:
 
         return results
 
-    async def get_miner_generator(self, ips: list, limit: int = 200) -> AsyncGenerator:
-        tasks = []
-        semaphore = asyncio.Semaphore(limit)
+    async def get_miner_generator(
+        self, ips: Union[Iterable[str], AsyncIterable[str]], limit: int = 200
+    ) -> AsyncGenerator:
+        """Identify multiple miners, yielding each one as soon as it is identified.
 
-        for ip in ips:
-            tasks.append(asyncio.create_task(self.get_miner(ip)))
+        At most `limit` identifications run at once. IPs are pulled from `ips` as identifications finish, so it can be
+        an async iterable fed by a running scan.
 
-        for task in tasks:
-            async with semaphore:
-                result = await task
-                if result is not None:
-                    yield result
+        Parameters:
+            ips: The IP addresses of the miners, as an iterable or an async iterable.
+            limit: The maximum number of miners to identify at once.
+
+        Returns:
+            An asynchronous generator of identified miners, in the order they were identified.
+        """
+        limit = max(1, limit)
+        if hasattr(ips, "__aiter__"):
+            source = ips.__aiter__()
+        else:
+            source = iter(ips)
+        exhausted = False
+        # identification tasks, and the task waiting for the next IP from an async source
+        pending = set()
+        fetch = None
+        try:
+            while True:
+                while not exhausted and fetch is None and len(pending) < limit:
+                    if isinstance(source, Iterator):
+                        try:
+                            next_ip = next(source)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        pending.add(asyncio.create_task(self.get_miner(next_ip)))
+                    else:
+                        # wait for the next IP alongside running identifications
+                        fetch = asyncio.ensure_future(source.__anext__())
+                if not pending and fetch is None:
+                    break
 
-    async def get_miner(self, ip: str):
+                waiting = pending | {fetch} if fetch is not None else pending
+                done, _ = await asyncio.wait(
+                    waiting, return_when=asyncio.FIRST_COMPLETED
+                )
+                if fetch is not None and fetch in done:
+                    done.discard(fetch)
+                    try:
+                        next_ip = fetch.result()
+                    except StopAsyncIteration:
+                        exhausted = True
+                    else:
+                        pending.add(asyncio.create_task(self.get_miner(next_ip)))
+                    fetch = None
+                for task in done:
+                    pending.discard(task)
+                    result = task.result()
+                    if result is not None:
+                        yield result
+        finally:
+            # the consumer stopped early, don't leave identifications running
+            if fetch is not None:
+                fetch.cancel()
+                pending.add(fetch)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def get_miner(self, ip: str, mac: Optional[str] = None):
+        """Identify a miner, and create the correct miner class for it.
+
+        Parameters:
+            ip: The IP address of the miner.
+            mac: The MAC address of the miner, if known, such as from an ARP table or [`MinerListener`][pyasic.miners.miner_listener.MinerListener].
+
+        Returns:
+            A miner, or `None` if the host could not be identified.
+            Failures are cached too, so `None` is returned right away until the failure expires.
+        """
         ip = str(ip)
-        if ip in self.cache:
+        try:
+            # a cached failure is None
             return self.cache[ip]
+        except KeyError:
+            pass
+
+        # responses are shared by every step of identifying this miner
+        identification = _Identification()
+        token = _identification.set(identification)
+        try:
+            miner = await self._get_miner(ip, mac)
+        finally:
+            _identification.reset(token)
+
+        if miner is None:
+            self.cache.set_failed(ip)
+        elif not isinstance(miner, UnknownMiner):
+            self.identified += 1
+            self.identify_connections += identification.connections
+        return miner
+
+    async def _get_miner(self, ip: str, mac: Optional[str] = None):
+        if self.inventory is not None:
+            start = time.monotonic()
+            miner = await self._get_miner_from_inventory(ip)
+            record_phase("inventory", start)
+            if miner is not None:
+                self.cache[ip] = miner
+                return miner
 
         miner_type = None
+        # likely miner types that already missed
+        tried = []
+
+        if mac is not None:
+            start = time.monotonic()
+            miner_type = await self._get_miner_type_from_mac(ip, mac, tried)
+            record_phase("oui", start)
+
+        affinity = self._get_affinity()
+        if miner_type is None and affinity is not None:
+            start = time.monotonic()
+            miner_type = await self._get_miner_type_from_affinity(ip, affinity, tried)
+            record_phase("affinity", start)
 
+        start = time.monotonic()
         for _ in range(settings.get("factory_get_retries", 1)):
+            if miner_type is not None:
+                break
             task = asyncio.create_task(self._get_miner_type(ip))
             try:
                 miner_type = await asyncio.wait_for(
@@ -457,7 +769,10 @@ class MinerFactory:
                 continue
             else:
                 if miner_type is not None:
+                    if affinity is not None:
+                        affinity.types.full(time.monotonic() - start)
                     break
+        record_phase("type", start)
 
         if miner_type is not None:
             miner_model = None
@@ -475,18 +790,19 @@ class MinerFactory:
             }
             fn = miner_model_fns.get(miner_type)
 
+            model_lookup = None
             if fn is not None:
-                task = asyncio.create_task(fn(ip))
-                try:
-                    miner_model = await asyncio.wait_for(
-                        task, timeout=settings.get("factory_get_timeout", 3)
-                    )
-                except asyncio.TimeoutError:
-                    pass
+                start = time.monotonic()
+                miner_model, model_lookup = await self._get_miner_model(
+                    ip, miner_type, fn, affinity
+                )
+                record_phase("model", start)
 
             boser_enabled = None
             if miner_type == MinerTypes.BRAIINS_OS:
+                start = time.monotonic()
                 boser_enabled = await self.get_boser_braiins_os(ip)
+                record_phase("boser", start)
 
             miner = self._select_miner_from_classes(
                 ip,
@@ -497,8 +813,129 @@ class MinerFactory:
 
             if miner is not None and not isinstance(miner, UnknownMiner):
                 self.cache[ip] = miner
+                if affinity is not None:
+                    affinity.learn(ip, miner_type.name, model_lookup)
+                if mac is not None:
+                    self.oui.learn(mac, miner_type.name)
+                if self.inventory is not None:
+                    entry = self.inventory.update(
+                        ip,
+                        miner_type=miner_type.name,
+                        model=miner_model,
+                        firmware=miner.api_type,
+                        boser=boser_enabled,
+                    )
+                    if mac is not None:
+                        entry.mac = mac
             return miner
 
+    async def _get_miner_from_inventory(self, ip: str) -> Optional[AnyMiner]:
+        entry = self.inventory.get(ip)
+        if entry is None:
+            return None
+        try:
+            miner_type = MinerTypes[entry.miner_type]
+        except KeyError:
+            self.inventory.remove(ip)
+            return None
+
+        try:
+            verified = await asyncio.wait_for(
+                self._verify_miner_type(ip, miner_type),
+                timeout=settings.get("factory_get_timeout", 3),
+            )
+        except asyncio.TimeoutError:
+            verified = False
+        if not verified:
+            # the miner changed or went away, identify it from scratch
+            return None
+
+        self.inventory.update(ip)
+        return self.miner_from_entry(entry)
+
+    def miner_from_entry(self, entry: InventoryEntry) -> AnyMiner:
+        """Create a miner from an [`InventoryEntry`][pyasic.miners.inventory.InventoryEntry], without contacting it.
+
+        Parameters:
+            entry: The stored identification of the miner.
+        """
+        return self._select_miner_from_classes(
+            entry.ip,
+            miner_type=MinerTypes[entry.miner_type],
+            miner_model=entry.model,
+            boser_enabled=entry.boser,
+        )
+
+    def _get_affinity(self) -> Optional[SubnetAffinity]:
+        if not settings.get("factory_subnet_affinity", True):
+            return None
+        return self.affinity
+
+    async def _get_miner_type_from_mac(
+        self, ip: str, mac: str, tried: list
+    ) -> Optional[MinerTypes]:
+        name = self.oui.lookup(mac)
+        if name is None or name not in MinerTypes.__members__:
+            return None
+        likely_type = MinerTypes[name]
+
+        miner_type = await self._try_miner_type(ip, likely_type)
+        # only a correct prediction is a hit, fall back to the full fingerprint if nothing was found
+        self.oui.record(hit=miner_type == likely_type)
+        if miner_type != likely_type:
+            tried.append(likely_type)
+        return miner_type
+
+    async def _get_miner_type_from_affinity(
+        self, ip: str, affinity: SubnetAffinity, tried: list
+    ) -> Optional[MinerTypes]:
+        name = affinity.miner_type(ip)
+        if name is None or name not in MinerTypes.__members__:
+            return None
+        likely_type = MinerTypes[name]
+        if likely_type in tried:
+            return None
+
+        start = time.monotonic()
+        miner_type = await self._try_miner_type(ip, likely_type)
+        if miner_type == likely_type:
+            affinity.types.hit(time.monotonic() - start)
+        else:
+            # a different type was still identified, but the prediction missed
+            affinity.types.miss()
+            tried.append(likely_type)
+        return miner_type
+
+    async def _try_miner_type(
+        self, ip: str, likely_type: MinerTypes
+    ) -> Optional[MinerTypes]:
+        # a short timeout, so a wrong guess costs little before the full identification
+        try:
+            return await asyncio.wait_for(
+                self._probe_miner_type(ip, likely_type),
+                timeout=settings.get("factory_probe_timeout", 0.5),
+            )
+        except asyncio.TimeoutError:
+            return None
+
+    async def _verify_miner_type(self, ip: str, miner_type: MinerTypes) -> bool:
+        return await self._probe_miner_type(ip, miner_type) == miner_type
+
+    async def _probe_miner_type(
+        self, ip: str, miner_type: MinerTypes
+    ) -> Optional[MinerTypes]:
+        # the single cheapest request that recognizes miner_type
+        if miner_type in WEB_VERIFIED_TYPES:
+            session = self.web_client()
+            text, resp = await self._web_ping(session, f"http://{ip}/")
+            if text is None:
+                return None
+            return self._parse_web_type(text, resp)
+        data = await self._socket_ping(ip, "version")
+        if data is None:
+            return None
+        return self._parse_socket_type(data)
+
     async def _get_miner_type(self, ip: str):
         tasks = [
             asyncio.create_task(self._get_miner_web(ip)),
@@ -509,22 +946,28 @@ class MinerFactory:
 
     async def _get_miner_web(self, ip: str):
         tasks = []
+
+        def matches(result: tuple) -> bool:
+            return result[0] is not None and self._parse_web_type(*result) is not None
+
         try:
-            urls = [f"http://{ip}/", f"https://{ip}/"]
-            async with httpx.AsyncClient(
-                transport=settings.transport(verify=False)
-            ) as session:
-                tasks = [
-                    asyncio.create_task(self._web_ping(session, url)) for url in urls
-                ]
-
-                text, resp = await concurrent_get_first_result(
-                    tasks,
-                    lambda x: x[0] is not None
-                    and self._parse_web_type(x[0], x[1]) is not None,
-                )
-                if text is not None:
-                    return self._parse_web_type(text, resp)
+            session = self.web_client()
+            http = asyncio.create_task(self._web_ping(session, f"http://{ip}/"))
+            tasks = [http]
+
+            # give http a head start, so https isn't needed if it identifies the miner
+            done, _ = await asyncio.wait(
+                tasks, timeout=settings.get("factory_web_https_delay", 0.25)
+            )
+            if http in done:
+                if matches(http.result()):
+                    return self._parse_web_type(*http.result())
+                tasks = []
+
+            tasks.append(asyncio.create_task(self._web_ping(session, f"https://{ip}/")))
+            text, resp = await concurrent_get_first_result(tasks, matches)
+            if text is not None:
+                return self._parse_web_type(text, resp)
         except asyncio.CancelledError:
             for t in tasks:
                 t.cancel()
@@ -537,9 +980,30 @@ class MinerFactory:
     async def _web_ping(
         session: httpx.AsyncClient, url: str
     ) -> Tuple[Optional[str], Optional[httpx.Response]]:
+        identification = _identification.get()
+        if identification is not None:
+            if url in identification.web:
+                return identification.web[url]
+            identification.connections += 1
         try:
-            resp = await session.get(url, follow_redirects=True)
-            return resp.text, resp
+            # only the start of the page is needed to fingerprint it
+            limit = settings.get("factory_web_fingerprint_bytes", 8192)
+            body = bytearray()
+            async with session.stream("GET", url, follow_redirects=True) as resp:
+                async for chunk in resp.aiter_bytes():
+                    body += chunk
+                    if len(body) >= limit:
+                        break
+            try:
+                text = body[:limit].decode(
+                    resp.charset_encoding or "utf-8", errors="replace"
+                )
+            except LookupError:
+                text = body[:limit].decode("utf-8", errors="replace")
+            if identification is not None:
+                identification.connections += len(resp.history)
+                identification.web[url] = (text, resp)
+            return text, resp
         except (
             httpx.HTTPError,
             asyncio.TimeoutError,
@@ -563,18 +1027,7 @@ class MinerFactory:
                 and "https://" in history_resp.headers.get("location", "")
             ):
                 return MinerTypes.WHATSMINER
-        if "Braiins OS" in web_text:
-            return MinerTypes.BRAIINS_OS
-        if "cloud-box" in web_text:
-            return MinerTypes.GOLDSHELL
-        if "AnthillOS" in web_text:
-            return MinerTypes.VNISH
-        if "Miner Web Dashboard" in web_text:
-            return MinerTypes.EPIC
-        if "Avalon" in web_text:
-            return MinerTypes.AVALONMINER
-        if "DragonMint" in web_text:
-            return MinerTypes.INNOSILICON
+        return WEB_SIGNATURES.match(web_text)
 
     async def _get_miner_socket(self, ip: str):
         tasks = []
@@ -601,7 +1054,12 @@ class MinerFactory:
 
     @staticmethod
     async def _socket_ping(ip: str, cmd: str) -> Optional[str]:
-        data = b""
+        identification = _identification.get()
+        if identification is not None:
+            if cmd in identification.socket:
+                return identification.socket[cmd].decode("utf-8")
+            identification.connections += 1
+
         try:
             reader, writer = await asyncio.wait_for(
                 asyncio.open_connection(str(ip), 4028),
@@ -610,24 +1068,15 @@ class MinerFactory:
         except (ConnectionError, OSError, asyncio.TimeoutError):
             return
 
-        cmd = {"command": cmd}
+        command = {"command": cmd}
 
         try:
             # send the command
-            writer.write(json.dumps(cmd).encode("utf-8"))
+            writer.write(json.dumps(command).encode("utf-8"))
             await writer.drain()
 
-            # loop to receive all the data
-            while True:
-                try:
-                    d = await asyncio.wait_for(reader.read(4096), timeout=1)
-                    if not d:
-                        break
-                    data += d
-                except asyncio.TimeoutError:
-                    pass
-                except ConnectionResetError:
-                    return
+            # receive until the response is complete, the caller's timeout bounds the wait
+            data = await read_response(reader)
         except asyncio.CancelledError:
             raise
         except (ConnectionError, OSError):
@@ -643,27 +1092,13 @@ class MinerFactory:
             except (ConnectionError, OSError):
                 return
         if data:
+            if identification is not None:
+                identification.socket[cmd] = data
             return data.decode("utf-8")
 
     @staticmethod
     def _parse_socket_type(data: str) -> MinerTypes:
-        upper_data = data.upper()
-        if "BOSMINER" in upper_data or "BOSER" in upper_data:
-            return MinerTypes.BRAIINS_OS
-        if "BTMINER" in upper_data or "BITMICRO" in upper_data:
-            return MinerTypes.WHATSMINER
-        if "VNISH" in upper_data:
-            return MinerTypes.VNISH
-        if "HIVEON" in upper_data:
-            return MinerTypes.HIVEON
-        if "LUXMINER" in upper_data:
-            return MinerTypes.LUX_OS
-        if "ANTMINER" in upper_data and not "DEVDETAILS" in upper_data:
-            return MinerTypes.ANTMINER
-        if "INTCHAINS_QOMO" in upper_data:
-            return MinerTypes.GOLDSHELL
-        if "AVALON" in upper_data:
-            return MinerTypes.AVALONMINER
+        return SOCKET_SIGNATURES.match(data)
 
     async def send_web_command(
         self,
@@ -671,16 +1106,19 @@ class MinerFactory:
         location: str,
         auth: Optional[httpx.DigestAuth] = None,
     ) -> Optional[dict]:
-        async with httpx.AsyncClient(transport=settings.transport()) as session:
-            try:
-                data = await session.get(
-                    f"http://{str(ip)}{location}",
-                    auth=auth,
-                    timeout=settings.get("factory_get_timeout", 3),
-                )
-            except (httpx.HTTPError, asyncio.TimeoutError):
-                logger.info(f"{ip}: Web command timeout.")
-                return
+        identification = _identification.get()
+        if identification is not None:
+            identification.connections += 1
+        session = self.web_client()
+        try:
+            data = await session.get(
+                f"http://{str(ip)}{location}",
+                auth=auth,
+                timeout=settings.get("factory_get_timeout", 3),
+            )
+        except (httpx.HTTPError, asyncio.TimeoutError):
+            logger.info(f"{ip}: Web command timeout.")
+            return
         if data is None:
             return
         try:
@@ -696,7 +1134,30 @@ class MinerFactory:
     async def send_api_command(
         self, ip: Union[ipaddress.ip_address, str], command: str
     ) -> Optional[dict]:
-        data = b""
+        identification = _identification.get()
+        if identification is not None and command in identification.socket:
+            # already fetched while identifying this miner
+            data = identification.socket[command]
+        else:
+            data = await self._send_api_command(ip, command)
+            if data is None:
+                return
+            if identification is not None and data:
+                identification.socket[command] = data
+
+        try:
+            return load_api_data(data)
+        except APIError:
+            return {}
+
+    @staticmethod
+    async def _send_api_command(
+        ip: Union[ipaddress.ip_address, str], command: str
+    ) -> Optional[bytes]:
+        identification = _identification.get()
+        if identification is not None:
+            identification.connections += 1
+
         try:
             reader, writer = await asyncio.open_connection(str(ip), 4028)
         except (ConnectionError, OSError):
@@ -708,12 +1169,7 @@ class MinerFactory:
             writer.write(json.dumps(cmd).encode("utf-8"))
             await writer.drain()
 
-            # loop to receive all the data
-            while True:
-                d = await reader.read(4096)
-                if not d:
-                    break
-                data += d
+            data = await read_response(reader)
 
             writer.close()
             await writer.wait_closed()
@@ -726,50 +1182,8 @@ class MinerFactory:
         if data == b"Socket connect failed: Connection refused\n":
             return
 
-        data = await self._fix_api_data(data)
-
-        try:
-            data = json.loads(data)
-        except json.JSONDecodeError:
-            return {}
-
         return data
 
-    @staticmethod
-    async def _fix_api_data(data: bytes):
-        if data.endswith(b"\x00"):
-            str_data = data.decode("utf-8")[:-1]
-        else:
-            str_data = data.decode("utf-8")
-        # fix an error with a btminer return having an extra comma that breaks json.loads()
-        str_data = str_data.replace(",}", "}")
-        # fix an error with a btminer return having a newline that breaks json.loads()
-        str_data = str_data.replace("\n", "")
-        # fix an error with a bmminer return not having a specific comma that breaks json.loads()
-        str_data = str_data.replace("}{", "},{")
-        # fix an error with a bmminer return having a specific comma that breaks json.loads()
-        str_data = str_data.replace("[,{", "[{")
-        # fix an error with a btminer return having a missing comma. (2023-01-06 version)
-        str_data = str_data.replace('""temp0', '","temp0')
-        # fix an error with Avalonminers returning inf and nan
-        str_data = str_data.replace("info", "1nfo")
-        str_data = str_data.replace("inf", "0")
-        str_data = str_data.replace("1nfo", "info")
-        str_data = str_data.replace("nan", "0")
-        # fix whatever this garbage from avalonminers is `,"id":1}`
-        if str_data.startswith(","):
-            str_data = f"{{{str_data[1:]}"
-        # try to fix an error with overflowing the recieve buffer
-        # this can happen in cases such as bugged btminers returning arbitrary length error info with 100s of errors.
-        if not str_data.endswith("}"):
-            str_data = ",".join(str_data.split(",")[:-1]) + "}"
-
-        # fix a really nasty bug with whatsminer API v2.0.4 where they return a list structured like a dict
-        if re.search(r"\"error_code\":\[\".+\"\]", str_data):
-            str_data = str_data.replace("[", "{").replace("]", "}")
-
-        return str_data
-
     @staticmethod
     def _select_miner_from_classes(
         ip: ipaddress.ip_address,
@@ -787,13 +1201,74 @@ class MinerFactory:
                 return MINER_CLASSES[miner_type][None](ip)
             return UnknownMiner(str(ip))
 
-    async def get_miner_model_antminer(self, ip: str):
-        tasks = [
-            asyncio.create_task(self._get_model_antminer_web(ip)),
-            asyncio.create_task(self._get_model_antminer_sock(ip)),
-        ]
+    async def _get_miner_model(
+        self,
+        ip: str,
+        miner_type: MinerTypes,
+        fn: Callable,
+        affinity: Optional[SubnetAffinity] = None,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        # returns the model, and the name of the model lookup that found it
+        timeout = settings.get("factory_get_timeout", 3)
+        lookups = MODEL_LOOKUPS.get(miner_type)
+
+        if lookups is not None and affinity is not None:
+            learned = affinity.model_lookup(ip, miner_type.name)
+            if learned in lookups:
+                start = time.monotonic()
+                try:
+                    miner_model = await asyncio.wait_for(
+                        getattr(self, learned)(ip), timeout=timeout
+                    )
+                except asyncio.TimeoutError:
+                    miner_model = None
+                if miner_model is not None:
+                    affinity.models.hit(time.monotonic() - start)
+                    return miner_model, learned
+                affinity.models.miss()
 
-        return await concurrent_get_first_result(tasks, lambda x: x is not None)
+        start = time.monotonic()
+        try:
+            if lookups is not None:
+                miner_model, lookup = await asyncio.wait_for(
+                    self._race_model_lookups(ip, lookups), timeout=timeout
+                )
+            else:
+                miner_model, lookup = await asyncio.wait_for(fn(ip), timeout), None
+        except asyncio.TimeoutError:
+            return None, None
+        if lookups is not None and miner_model is not None and affinity is not None:
+            affinity.models.full(time.monotonic() - start)
+        return miner_model, lookup
+
+    async def _race_model_lookups(
+        self, ip: str, lookups: List[str]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        async def lookup(name: str):
+            return await getattr(self, name)(ip), name
+
+        # lookups that can reuse a response from identification don't need to race
+        identification = _identification.get()
+        if identification is not None:
+            for name in lookups:
+                if MODEL_LOOKUP_COMMANDS.get(name) in identification.socket:
+                    miner_model, _ = await lookup(name)
+                    if miner_model is not None:
+                        return miner_model, name
+
+        tasks = [asyncio.create_task(lookup(name)) for name in lookups]
+        miner_model, name = await concurrent_get_first_result(
+            tasks, lambda x: x[0] is not None
+        )
+        if miner_model is None:
+            return None, None
+        return miner_model, name
+
+    async def get_miner_model_antminer(self, ip: str):
+        miner_model, _ = await self._race_model_lookups(
+            ip, MODEL_LOOKUPS[MinerTypes.ANTMINER]
+        )
+        return miner_model
 
     async def _get_model_antminer_web(self, ip: str):
         # last resort, this is slow
@@ -867,21 +1342,21 @@ class MinerFactory:
 
     async def get_miner_model_innosilicon(self, ip: str) -> Optional[str]:
         try:
-            async with httpx.AsyncClient(transport=settings.transport()) as session:
-                auth_req = await session.post(
-                    f"http://{ip}/api/auth",
-                    data={"username": "admin", "password": "admin"},
-                )
-                auth = auth_req.json()["jwt"]
+            session = self.web_client()
+            auth_req = await session.post(
+                f"http://{ip}/api/auth",
+                data={"username": "admin", "password": "admin"},
+            )
+            auth = auth_req.json()["jwt"]
 
-                web_data = (
-                    await session.post(
-                        f"http://{ip}/api/type",
-                        headers={"Authorization": "Bearer " + auth},
-                        data={},
-                    )
-                ).json()
-                return web_data["type"]
+            web_data = (
+                await session.post(
+                    f"http://{ip}/api/type",
+                    headers={"Authorization": "Bearer " + auth},
+                    data={},
+                )
+            ).json()
+            return web_data["type"]
         except (httpx.HTTPError, LookupError):
             pass
 
@@ -897,11 +1372,10 @@ class MinerFactory:
             pass
 
         try:
-            async with httpx.AsyncClient(transport=settings.transport()) as session:
-                d = await session.post(
-                    f"http://{ip}/graphql",
-                    json={"query": "{bosminer {info{modelName}}}"},
-                )
+            d = await self.web_client().post(
+                f"http://{ip}/graphql",
+                json={"query": "{bosminer {info{modelName}}}"},
+            )
             if d.status_code == 200:
                 json_data = d.json()
                 miner_model = json_data["data"]["bosminer"]["info"]["modelName"]
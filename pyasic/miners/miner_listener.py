@@ -15,66 +15,131 @@
 # ------------------------------------------------------------------------------
 
 import asyncio
+from typing import AsyncIterator, Optional
 
+from pyasic.logger import logger
+from pyasic.miners.base import AnyMiner
+from pyasic.miners.miner_factory import miner_factory
 from pyasic.misc import Singleton
 
 
-class _MinerListener:
-    def __init__(self):
-        self.responses = {}
+class _MinerListener(asyncio.DatagramProtocol):
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
         self.transport = None
 
     def connection_made(self, transport):
         self.transport = transport
 
-    @staticmethod
-    def datagram_received(data, _addr):
-        m = data.decode()
-        if "," in m:
-            ip, mac = m.split(",")
-        else:
-            d = m[:-1].split("MAC")
-            ip = d[0][3:]
-            mac = d[1][1:]
-
-        new_miner = {"IP": ip, "MAC": mac.upper()}
-        MinerListener().new_miner = new_miner
+    def datagram_received(self, data, _addr):
+        try:
+            m = data.decode()
+            if "," in m:
+                ip, mac = m.split(",")
+            else:
+                d = m[:-1].split("MAC")
+                ip = d[0][3:]
+                mac = d[1][1:]
+        except (UnicodeDecodeError, ValueError, IndexError):
+            logger.debug(f"MinerListener: ignoring malformed datagram {data}")
+            return
+
+        self.queue.put_nowait({"IP": ip, "MAC": mac.upper()})
 
     def connection_lost(self, _):
         pass
 
 
 class MinerListener(metaclass=Singleton):
+    """Listen for the IP report datagrams miners send when their IP report button is pressed.
+
+    Datagrams are queued as they arrive, so bursts from many miners at once are not lost.
+    """
+
+    # ports miners send IP reports to
+    PORTS = [14235, 8888]
+
     def __init__(self):
         self.found_miners = []
-        self.new_miner = None
         self.stop = False
+        self._queue: Optional[asyncio.Queue] = None
+
+    async def listen(self) -> AsyncIterator[dict]:
+        """Listen for IP reports until [`cancel()`][pyasic.miners.miner_listener.MinerListener.cancel] is called.
 
-    async def listen(self):
+        Returns:
+            An asynchronous generator of dicts containing the `IP` and `MAC` of each miner that reported.
+        """
         self.stop = False
+        self._queue = queue = asyncio.Queue()
 
         loop = asyncio.get_running_loop()
 
-        transport_14235, protocol_14235 = await loop.create_datagram_endpoint(
-            lambda: _MinerListener(), local_addr=("0.0.0.0", 14235)  # noqa
-        )
-        transport_8888, protocol_8888 = await loop.create_datagram_endpoint(
-            lambda: _MinerListener(), local_addr=("0.0.0.0", 8888)  # noqa
-        )
-
-        while True:
-            if self.new_miner:
-                yield self.new_miner
-                self.found_miners.append(self.new_miner)
-                self.new_miner = None
-            if self.stop:
-                transport_14235.close()
-                transport_8888.close()
-                break
-            await asyncio.sleep(0)
+        transports = []
+        try:
+            for port in self.PORTS:
+                transport, _ = await loop.create_datagram_endpoint(
+                    lambda: _MinerListener(queue), local_addr=("0.0.0.0", port)
+                )
+                transports.append(transport)
+
+            while not self.stop:
+                new_miner = await queue.get()
+                # None is queued by cancel() to wake the listener up
+                if new_miner is None:
+                    continue
+                self.found_miners.append(new_miner)
+                yield new_miner
+        finally:
+            for transport in transports:
+                transport.close()
+            self._queue = None
+
+    async def listen_for_miners(self) -> AsyncIterator[AnyMiner]:
+        """Listen for IP reports, and identify each reporting miner with [`MinerFactory`][pyasic.miners.miner_factory.MinerFactory].
+
+        Miners are identified concurrently, and yielded as soon as they are identified.
+
+        Returns:
+            An asynchronous generator of miners.
+        """
+        results = asyncio.Queue()
+        tasks = set()
+
+        async def identify(ip: str, mac: str):
+            miner = await miner_factory.get_miner(ip, mac=mac)
+            if miner is not None:
+                results.put_nowait(miner)
+
+        async def feed():
+            try:
+                async for new_miner in self.listen():
+                    task = asyncio.create_task(
+                        identify(new_miner["IP"], new_miner["MAC"])
+                    )
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                await asyncio.gather(*tasks, return_exceptions=True)
+            finally:
+                results.put_nowait(None)
+
+        feeder = asyncio.create_task(feed())
+        try:
+            while True:
+                miner = await results.get()
+                if miner is None:
+                    break
+                yield miner
+        finally:
+            feeder.cancel()
+            for task in list(tasks):
+                task.cancel()
+            await asyncio.gather(feeder, *tasks, return_exceptions=True)
 
     async def cancel(self):
         self.stop = True
+        if self._queue is not None:
+            self._queue.put_nowait(None)
 
 
 async def main():
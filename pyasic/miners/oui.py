@@ -0,0 +1,120 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import re
+from collections import Counter
+from typing import Dict, Optional
+
+# OUIs assigned to miner manufacturers in the IEEE registry
+# MicroBT and Canaan boards use MACs from their network chip vendors, so WhatsMiners and Avalons are learned instead
+DEFAULT_OUIS: Dict[str, str] = {
+    "E0:A5:09": "ANTMINER",  # Bitmain Technologies Inc
+    "50:6C:BE": "INNOSILICON",  # InnosiliconTechnology Ltd
+}
+
+
+def oui_from_mac(mac: str) -> Optional[str]:
+    """Get the OUI, the first three octets, of a MAC address.
+
+    Parameters:
+        mac: A MAC address, separated by `:`, `-` or `.`, or not at all.
+
+    Returns:
+        The OUI in the form `AA:BB:CC`, or `None` if `mac` is not a MAC address.
+    """
+    digits = re.sub(r"[^0-9A-Fa-f]", "", str(mac))
+    if len(digits) != 12:
+        return None
+    digits = digits.upper()
+    return f"{digits[0:2]}:{digits[2:4]}:{digits[4:6]}"
+
+
+class OUITable:
+    """A table of MAC address prefixes (OUIs) to the miner type hosts with that prefix usually are.
+
+    The table starts with the OUIs of known miner manufacturers, in `DEFAULT_OUIS`.
+    Prefixes can be registered up front, and are learned from every miner identified with a known MAC address.
+    Registered prefixes take precedence over learned ones, and learned ones over the defaults, so a fleet of
+    Antminers running other firmware is recognised once it has been seen.
+
+    Parameters:
+        entries: An optional dict of OUI or MAC address to [`MinerTypes`][pyasic.miners.miner_factory.MinerTypes] name to register.
+        defaults: The OUIs to start from, `DEFAULT_OUIS` if not given. Pass `{}` to start empty.
+    """
+
+    def __init__(self, entries: Dict[str, str] = None, defaults: Dict[str, str] = None):
+        self.defaults: Dict[str, str] = dict(
+            DEFAULT_OUIS if defaults is None else defaults
+        )
+        self.registered: Dict[str, str] = {}
+        # oui -> count of each miner type identified with it
+        self.learned: Dict[str, Counter] = {}
+        self.hits = 0
+        self.misses = 0
+        for prefix, miner_type in (entries or {}).items():
+            self.register(prefix, miner_type)
+
+    def __len__(self):
+        return len(self.registered.keys() | self.learned.keys() | self.defaults.keys())
+
+    def register(self, prefix: str, miner_type: str) -> None:
+        """Register the miner type of an OUI.
+
+        Parameters:
+            prefix: An OUI such as `AA:BB:CC`, or a full MAC address.
+            miner_type: The name of a [`MinerTypes`][pyasic.miners.miner_factory.MinerTypes] member, such as `"ANTMINER"`.
+        """
+        oui = oui_from_mac(prefix + ":00:00:00" if len(prefix) <= 8 else prefix)
+        if oui is None:
+            raise ValueError(f"Invalid OUI: {prefix}")
+        self.registered[oui] = miner_type
+
+    def learn(self, mac: str, miner_type: str) -> None:
+        oui = oui_from_mac(mac)
+        if oui is None:
+            return
+        if oui not in self.learned:
+            self.learned[oui] = Counter()
+        self.learned[oui][miner_type] += 1
+
+    def lookup(self, mac: str) -> Optional[str]:
+        """Get the most likely miner type of a MAC address.
+
+        Parameters:
+            mac: The MAC address of the host.
+
+        Returns:
+            The name of a [`MinerTypes`][pyasic.miners.miner_factory.MinerTypes] member, or `None` if the OUI is unknown.
+        """
+        oui = oui_from_mac(mac)
+        if oui is None:
+            return None
+        if oui in self.registered:
+            return self.registered[oui]
+        counts = self.learned.get(oui)
+        if counts:
+            return counts.most_common(1)[0][0]
+        return self.defaults.get(oui)
+
+    def record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        total = self.hits + self.misses
+        return self.hits / total if total else None
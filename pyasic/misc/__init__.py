@@ -13,6 +13,8 @@
 #  See the License for the specific language governing permissions and         -
 #  limitations under the License.                                              -
 # ------------------------------------------------------------------------------
+import functools
+
 from pyasic.API import APIError
 
 
@@ -28,6 +30,7 @@ class Singleton(type):
 def api_min_version(version: str):
     def decorator(func):
         # handle the inner function that the decorator is wrapping
+        @functools.wraps(func)
         async def inner(*args, **kwargs):
             api_ver = args[0].api_ver
 
@@ -70,6 +73,8 @@ def api_min_version(version: str):
 
             return await func(*args, **kwargs)
 
+        # read by the command registry of the API
+        inner.min_api_version = version
         return inner
 
     return decorator
@@ -16,26 +16,59 @@
 
 import asyncio
 import ipaddress
+import itertools
 import logging
-from typing import AsyncIterator, List, Union
+import time
+from pathlib import Path
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Union,
+)
 
 from pyasic import settings
-from pyasic.miners.miner_factory import AnyMiner, miner_factory
+from pyasic.miners.miner_factory import (
+    AnyMiner,
+    miner_factory,
+    phase_timer,
+    record_phase,
+)
+from pyasic.miners.unknown import UnknownMiner
+from pyasic.network.checkpoint import ScanCheckpoint
+from pyasic.network.concurrency import AdaptiveConcurrency
+from pyasic.network.hosts import HostSet, compute_oct_range
+from pyasic.network.neighbors import PROC_NET_ARP, read_neighbors
+from pyasic.network.progress import ScanProgress
+from pyasic.network.rate_limit import SubnetRateLimiter
+from pyasic.network.sharding import sharded_scan
 
 
 class MinerNetwork:
     """A class to handle a network containing miners. Handles scanning and gets miners via [`MinerFactory`][pyasic.miners.miner_factory.MinerFactory].
 
     Parameters:
-        hosts: A list of `ipaddress.IPv4Address` to be used when scanning.
+        hosts: A [`HostSet`][pyasic.network.hosts.HostSet], or an iterable of `ipaddress.IPv4Address` to be used when scanning.
     """
 
-    def __init__(self, hosts: List[ipaddress.IPv4Address]):
+    def __init__(self, hosts: Union[HostSet, Iterable[ipaddress.IPv4Address]]):
+        if not isinstance(hosts, HostSet):
+            hosts = HostSet.from_addresses(hosts)
         self.hosts = hosts
+        self.concurrency: Optional[AdaptiveConcurrency] = None
+        self.progress: Optional[ScanProgress] = None
+        self.neighbors: Dict[str, str] = {}
 
     def __len__(self):
         return len(self.hosts)
 
+    def __contains__(self, item):
+        return item in self.hosts
+
     @classmethod
     def from_list(cls, addresses: list) -> "MinerNetwork":
         """Parse a list of address constructors into a MinerNetwork.
@@ -43,10 +76,7 @@ class MinerNetwork:
         Parameters:
             addresses: A list of address constructors, such as `["10.1-2.1.1-50", "10.4.1-2.1-50"]`.
         """
-        hosts = []
-        for address in addresses:
-            hosts = [*hosts, *cls.from_address(address).hosts]
-        return cls(sorted(list(set(hosts))))
+        return cls(HostSet().union(*[cls.from_address(a).hosts for a in addresses]))
 
     @classmethod
     def from_address(cls, address: str) -> "MinerNetwork":
@@ -74,31 +104,7 @@ class MinerNetwork:
             oct_3: An octet constructor, such as `"1"`.
             oct_4: An octet constructor, such as `"1-50"`.
         """
-
-        hosts = []
-
-        oct_1_val_start, oct_1_start, oct_1_end = compute_oct_range(oct_1)
-        for oct_1_idx in range((abs(oct_1_end - oct_1_start)) + 1):
-            oct_1_val = str(oct_1_idx + oct_1_start)
-
-            oct_2_val_start, oct_2_start, oct_2_end = compute_oct_range(oct_2)
-            for oct_2_idx in range((abs(oct_2_end - oct_2_start)) + 1):
-                oct_2_val = str(oct_2_idx + oct_2_start)
-
-                oct_3_val_start, oct_3_start, oct_3_end = compute_oct_range(oct_3)
-                for oct_3_idx in range((abs(oct_3_end - oct_3_start)) + 1):
-                    oct_3_val = str(oct_3_idx + oct_3_start)
-
-                    oct_4_val_start, oct_4_start, oct_4_end = compute_oct_range(oct_4)
-                    for oct_4_idx in range((abs(oct_4_end - oct_4_start)) + 1):
-                        oct_4_val = str(oct_4_idx + oct_4_start)
-
-                        hosts.append(
-                            ipaddress.ip_address(
-                                ".".join([oct_1_val, oct_2_val, oct_3_val, oct_4_val])
-                            )
-                        )
-        return cls(sorted(hosts))
+        return cls(HostSet.from_octets(oct_1, oct_2, oct_3, oct_4))
 
     @classmethod
     def from_subnet(cls, subnet: str) -> "MinerNetwork":
@@ -107,116 +113,510 @@ class MinerNetwork:
         Parameters:
             subnet: A subnet string, such as `"10.0.0.1/24"`.
         """
-        return cls(list(ipaddress.ip_network(subnet, strict=False).hosts()))
+        return cls(HostSet.from_subnet(subnet))
 
-    async def scan(self) -> List[AnyMiner]:
+    def exclude(self, addresses: list) -> "MinerNetwork":
+        """Create a new MinerNetwork without some hosts.
+
+        Parameters:
+            addresses: A list of address constructors or subnets to exclude, such as `["10.1.1.1-10", "10.2.0.0/24"]`.
+        """
+        excluded = HostSet()
+        for address in addresses:
+            if "/" in address:
+                excluded = excluded | HostSet.from_subnet(address, hosts_only=False)
+            else:
+                excluded = excluded | self.from_address(address).hosts
+        return self.__class__(self.hosts - excluded)
+
+    async def scan(
+        self,
+        checkpoint: Union[str, Path, None] = None,
+        progress: Callable[[ScanProgress], None] = None,
+        neighbors: Union[bool, str, Path, Dict[str, str], None] = None,
+    ) -> List[AnyMiner]:
         """Scan the network for miners.
 
+        Parameters:
+            checkpoint: An optional file to periodically save scan progress to, and to resume the scan from.
+            progress: An optional function, or coroutine function, to call with a [`ScanProgress`][pyasic.network.progress.ScanProgress] as the scan runs.
+            neighbors: An optional neighbor table to probe known-live hosts first from, see [`scan_network_generator()`][pyasic.network.MinerNetwork.scan_network_generator].
+
         Returns:
             A list of found miners.
         """
-        return await self.scan_network_for_miners()
+        return await self.scan_network_for_miners(
+            checkpoint=checkpoint, progress=progress, neighbors=neighbors
+        )
 
-    async def scan_network_for_miners(self) -> List[AnyMiner]:
+    async def scan_network_for_miners(
+        self,
+        checkpoint: Union[str, Path, None] = None,
+        progress: Callable[[ScanProgress], None] = None,
+        neighbors: Union[bool, str, Path, Dict[str, str], None] = None,
+    ) -> List[AnyMiner]:
         logging.debug(f"{self} - (Scan Network For Miners) - Scanning")
 
         # clear cached miners
         miner_factory.clear_cached_miners()
 
-        limit = asyncio.Semaphore(settings.get("network_scan_threads", 300))
-        miners = await asyncio.gather(
-            *[self.ping_and_get_miner(host, limit) for host in self.hosts]
-        )
-
         # remove all None from the miner list
-        miners = list(filter(None, miners))
+        miners = [
+            miner
+            async for miner in self.scan_network_generator(
+                checkpoint=checkpoint, progress=progress, neighbors=neighbors
+            )
+            if miner
+        ]
+
+        # persist what was found for the next scan
+        if miner_factory.inventory is not None:
+            miner_factory.inventory.save()
         logging.debug(
             f"{self} - (Scan Network For Miners) - Found {len(miners)} miners"
         )
 
-        # return the miner objects
-        return miners
+        # return the miner objects in network order
+        return sorted(miners, key=lambda m: ipaddress.ip_address(str(m.ip)))
 
-    async def scan_network_generator(self) -> AsyncIterator[AnyMiner]:
+    async def scan_network_generator(
+        self,
+        checkpoint: Union[str, Path, None] = None,
+        progress: Callable[[ScanProgress], None] = None,
+        neighbors: Union[bool, str, Path, Dict[str, str], None] = None,
+    ) -> AsyncIterator[AnyMiner]:
         """
         Scan the network for miners using an async generator.
 
+        Hosts are pulled lazily from [`hosts`][pyasic.network.MinerNetwork], and at most
+        `network_scan_threads` probes are in flight at once, so memory use does not grow with the size of the network.
+
+        If the `network_scan_adaptive` setting is enabled, the number of in-flight probes is instead tuned during the scan
+        by an [`AdaptiveConcurrency`][pyasic.network.concurrency.AdaptiveConcurrency] controller, which is kept in
+        `self.concurrency` so its stats can be inspected afterwards.
+
+        If the `network_scan_subnet_rate` setting is set, probes into each subnet of prefix length `network_scan_subnet_prefix`
+        are limited to that many per second, with bursts of up to `network_scan_subnet_burst`, and hosts are scanned
+        alternating between subnets so the total scan rate stays high.
+
+        If a neighbor table is passed, or set in the `network_scan_neighbors` setting, hosts that appear in it are probed
+        before all others, so most miners are found in the first seconds of the scan. If `network_scan_neighbors_only`
+        is enabled, hosts missing from the table are skipped entirely. The table is kept in `self.neighbors`.
+
+        If a checkpoint file is passed, progress is saved to it every `network_scan_checkpoint_interval` seconds.
+        If the file already holds a checkpoint for these hosts, the miners it found are yielded first,
+        and the scan continues from where it stopped. The file is removed once the scan completes.
+
+        Progress is tracked in a [`ScanProgress`][pyasic.network.progress.ScanProgress], kept in `self.progress`, with counts of
+        probed, alive and identified hosts, an ETA, and latency histograms of each phase of finding a miner.
+        If a progress function is passed, it is called with the `ScanProgress` at most every `network_scan_progress_interval`
+        seconds, and once more when the scan completes. Passing `queue.put_nowait` of an `asyncio.Queue` turns this into a stream.
+
+        Parameters:
+            checkpoint: An optional file to periodically save scan progress to, and to resume the scan from.
+            progress: An optional function, or coroutine function, to call with a [`ScanProgress`][pyasic.network.progress.ScanProgress] as the scan runs.
+            neighbors: `True` to read the kernel's ARP table, the path to a dump of `/proc/net/arp` or `ip neigh`, or a dict of IP to MAC address.
+
         Returns:
              An asynchronous generator containing found miners.
         """
-        # get the current event loop
-        loop = asyncio.get_event_loop()
-
-        # create a list of scan tasks
-        limit = asyncio.Semaphore(settings.get("network_scan_threads", 300))
-        miners = asyncio.as_completed(
-            [
-                loop.create_task(self.ping_and_get_miner(host, limit))
-                for host in self.hosts
-            ]
+        window = settings.get("network_scan_threads", 300)
+        self.concurrency = None
+        if settings.get("network_scan_adaptive", False):
+            self.concurrency = AdaptiveConcurrency(
+                initial=window,
+                minimum=settings.get("network_scan_min_threads", 10),
+                maximum=settings.get("network_scan_max_threads", 3000),
+            )
+
+        rate_limiter = None
+        order = "sequential"
+        if settings.get("network_scan_subnet_rate") is not None:
+            rate_limiter = SubnetRateLimiter(
+                rate=settings.get("network_scan_subnet_rate"),
+                burst=settings.get("network_scan_subnet_burst", 10),
+                prefix=settings.get("network_scan_subnet_prefix", 24),
+            )
+            order = f"interleaved/{rate_limiter.prefix}"
+
+        if neighbors is None:
+            neighbors = settings.get("network_scan_neighbors")
+        seeded, rest = self._seed_hosts(neighbors)
+        if seeded is not None:
+            # the seeded hosts are part of the order, a checkpoint is only valid for the same table
+            mode = "only" if not rest else "first"
+            order = f"{order}/neighbors:{mode}:{seeded.intervals}"
+
+        scan_checkpoint = None
+        start = 0
+        if checkpoint is not None:
+            scan_checkpoint = ScanCheckpoint(checkpoint, self.hosts, order=order)
+            start = scan_checkpoint.position
+            if scan_checkpoint.found:
+                logging.debug(
+                    f"{self} - (Scan Network Generator) - Resuming from host {start}"
+                )
+                async for miner in miner_factory.get_miner_generator(
+                    scan_checkpoint.found_ips
+                ):
+                    yield miner
+
+        if seeded is None:
+            total = len(self.hosts)
+            parts = [self.hosts]
+        else:
+            total = len(seeded) + len(rest)
+            parts = [seeded, rest]
+
+        self.progress = ScanProgress(
+            total=total - start,
+            callback=progress,
+            interval=settings.get("network_scan_progress_interval", 0.5),
         )
-        for miner in miners:
-            try:
-                yield await miner
-            except TimeoutError:
-                yield None
+
+        if rate_limiter is None:
+            if len(parts) == 1:
+                hosts = self.hosts.iter_from(start)
+            else:
+                hosts = itertools.islice(itertools.chain(*parts), start, None)
+        else:
+            # spread probes across subnets, so one busy subnet doesn't hold up the window
+            hosts = itertools.islice(
+                itertools.chain(
+                    *[part.iter_interleaved(rate_limiter.prefix) for part in parts]
+                ),
+                start,
+                None,
+            )
+
+        async for miner in self._scan_window(
+            hosts,
+            window,
+            concurrency=self.concurrency,
+            rate_limiter=rate_limiter,
+            progress=self.progress,
+            checkpoint=scan_checkpoint,
+            start=start,
+        ):
+            yield miner
+
+        await self.progress.finish()
+
+        if scan_checkpoint is not None:
+            scan_checkpoint.clear()
+
+    def _seed_hosts(
+        self, neighbors: Union[bool, str, Path, Dict[str, str], None]
+    ) -> tuple:
+        # returns the hosts seen in the neighbor table and the rest, or (None, None) without a table
+        self.neighbors = {}
+        if not neighbors:
+            return None, None
+        if neighbors is True:
+            neighbors = PROC_NET_ARP
+        if isinstance(neighbors, dict):
+            self.neighbors = {str(ip): mac.upper() for ip, mac in neighbors.items()}
+        else:
+            self.neighbors = read_neighbors(neighbors)
+
+        seen = []
+        for ip in self.neighbors:
+            address = ipaddress.ip_address(ip)
+            if address.version == self.hosts.version and address in self.hosts:
+                seen.append(address)
+        seeded = HostSet.from_addresses(seen)
+        if not seeded:
+            seeded = HostSet(version=self.hosts.version)
+
+        if settings.get("network_scan_neighbors_only", False):
+            rest = HostSet(version=self.hosts.version)
+        else:
+            rest = self.hosts - seeded
+        logging.debug(
+            f"{self} - (Scan Network Generator) - {len(seeded)} hosts seen in the neighbor table"
+        )
+        return seeded, rest
+
+    async def scan_sharded(self, processes: Optional[int] = None) -> List[AnyMiner]:
+        """Scan the network for miners from several processes.
+
+        Parameters:
+            processes: The number of worker processes. Defaults to the `network_scan_processes` setting, or the CPU count.
+
+        Returns:
+            A list of found miners.
+        """
+        miners = [miner async for miner in self.scan_sharded_generator(processes)]
+
+        if miner_factory.inventory is not None:
+            miner_factory.inventory.save()
+        return sorted(miners, key=lambda m: ipaddress.ip_address(str(m.ip)))
+
+    async def scan_sharded_generator(
+        self, processes: Optional[int] = None
+    ) -> AsyncIterator[AnyMiner]:
+        """
+        Scan the network for miners from several processes using an async generator.
+
+        The hosts are split between worker processes, each running its own event loop and
+        [`MinerFactory`][pyasic.miners.miner_factory.MinerFactory], so scan throughput scales with CPU cores.
+        Workers send back how each miner was identified, and the miners are created in this process.
+
+        Parameters:
+            processes: The number of worker processes. Defaults to the `network_scan_processes` setting, or the CPU count.
+
+        Returns:
+             An asynchronous generator containing found miners.
+        """
+        async for entry in sharded_scan(self.hosts, processes):
+            if entry.miner_type is None:
+                yield UnknownMiner(entry.ip)
+                continue
+            miner = miner_factory.miner_from_entry(entry)
+            miner_factory.cache[entry.ip] = miner
+            if miner_factory.inventory is not None:
+                miner_factory.inventory.update(
+                    entry.ip,
+                    miner_type=entry.miner_type,
+                    model=entry.model,
+                    firmware=entry.firmware,
+                    boser=entry.boser,
+                )
+            yield miner
+
+    async def _scan_window(
+        self,
+        hosts: Iterator[ipaddress.ip_address],
+        window: int,
+        concurrency: AdaptiveConcurrency = None,
+        rate_limiter: SubnetRateLimiter = None,
+        progress: ScanProgress = None,
+        checkpoint: ScanCheckpoint = None,
+        start: int = 0,
+    ) -> AsyncIterator[Optional[AnyMiner]]:
+        # task -> position of its host
+        pending = {}
+        hosts = enumerate(hosts, start)
+        next_position = start
+        hosts_exhausted = False
+        try:
+            while True:
+                if concurrency is not None:
+                    window = concurrency.limit
+                # top up the window with new probes
+                while not hosts_exhausted and len(pending) < window:
+                    try:
+                        position, host = next(hosts)
+                    except StopIteration:
+                        hosts_exhausted = True
+                        break
+                    task = asyncio.create_task(
+                        self._ping_and_get_miner(
+                            host,
+                            concurrency,
+                            rate_limiter,
+                            progress,
+                            self.neighbors.get(str(host)),
+                        )
+                    )
+                    pending[task] = position
+                    next_position = position + 1
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    position = pending.pop(task)
+                    try:
+                        miner = task.result()
+                    except asyncio.TimeoutError:
+                        miner = None
+                    if miner is not None and checkpoint is not None:
+                        checkpoint.add_miner(miner.ip, position)
+                    if progress is not None:
+                        progress.record_probe(identified=miner is not None)
+                    yield miner
+
+                if progress is not None:
+                    await progress.notify()
+
+                if checkpoint is not None:
+                    # every host before the oldest running probe is done
+                    checkpoint.update(
+                        min(pending.values()) if pending else next_position
+                    )
+        finally:
+            # the consumer stopped early, don't leave probes running
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
 
     @staticmethod
     async def ping_and_get_miner(
         ip: ipaddress.ip_address, semaphore: asyncio.Semaphore
     ) -> Union[None, AnyMiner]:
         async with semaphore:
-            try:
-                return await ping_and_get_miner(ip)
-            except ConnectionRefusedError:
-                tasks = [
-                    ping_and_get_miner(ip, port=port) for port in [4028, 4029, 8889]
-                ]
-                for miner in asyncio.as_completed(tasks):
-                    try:
-                        return await miner
-                    except ConnectionRefusedError:
-                        pass
+            return await MinerNetwork._ping_and_get_miner(ip)
+
+    @staticmethod
+    async def _ping_and_get_miner(
+        ip: ipaddress.ip_address,
+        concurrency: AdaptiveConcurrency = None,
+        rate_limiter: SubnetRateLimiter = None,
+        progress: ScanProgress = None,
+        mac: Optional[str] = None,
+    ) -> Union[None, AnyMiner]:
+        if rate_limiter is not None:
+            await rate_limiter.acquire(ip)
+        token = None
+        if progress is not None:
+            # collect connect and identification timings from this probe
+            token = phase_timer.set(progress.record_phase)
+        try:
+            return await ping_and_get_miner(ip, concurrency=concurrency, mac=mac)
+        except ConnectionRefusedError:
+            return None
+        finally:
+            if token is not None:
+                phase_timer.reset(token)
+
+
+# ports a miner may answer on, in order of preference
+SCAN_PORTS = [80, 4028, 4029, 8889]
 
 
 async def ping_and_get_miner(
-    ip: ipaddress.ip_address, port=80
+    ip: ipaddress.ip_address,
+    port: int = None,
+    concurrency: AdaptiveConcurrency = None,
+    mac: Optional[str] = None,
 ) -> Union[None, AnyMiner]:
+    """Check if a host is reachable, and identify it as a miner if it is.
+
+    Parameters:
+        ip: The IP address of the host.
+        port: A single port to check, or `None` to race all of `SCAN_PORTS`.
+        concurrency: An optional controller to report the connection outcome to.
+        mac: The MAC address of the host, if known, to speed up identification.
+
+    Returns:
+        A miner, or `None` if the host could not be reached.
+
+    Raises:
+        ConnectionRefusedError: If every port refused the connection.
+    """
+    ports = SCAN_PORTS if port is None else [port]
     for i in range(settings.get("network_ping_retries", 1)):
         try:
-            connection_fut = asyncio.open_connection(str(ip), port)
-            # get the read and write streams from the connection
-            reader, writer = await asyncio.wait_for(
-                connection_fut, timeout=settings.get("network_ping_timeout", 3)
-            )
-            # immediately close connection, we know connection happened
-            writer.close()
-            # make sure the writer is closed
-            await writer.wait_closed()
-            # ping was successful
-            return await miner_factory.get_miner(ip)
-        except asyncio.exceptions.TimeoutError:
-            # ping failed if we time out
-            continue
-        except OSError as e:
-            raise ConnectionRefusedError from e
+            open_port = await ping(ip, ports, concurrency=concurrency)
+        except ConnectionRefusedError:
+            raise
         except Exception as e:
             logging.warning(f"{str(ip)}: Unhandled ping exception: {e}")
             return
+        if open_port is not None:
+            # ping was successful
+            try:
+                return await miner_factory.get_miner(ip, mac=mac)
+            except Exception as e:
+                # one misbehaving host shouldn't stop the scan
+                logging.warning(f"{str(ip)}: Unhandled identification exception: {e}")
+                return
     return
 
 
-def compute_oct_range(octet: str) -> tuple:
-    octet_split = octet.split("-")
-    octet_start = int(octet_split[0])
-    octet_end = None
+async def ping(
+    ip: ipaddress.ip_address, ports: List[int], concurrency: AdaptiveConcurrency = None
+) -> Optional[int]:
+    """Race connections to several ports on a host, and return the first one to connect.
+
+    Connection attempts are staggered by `network_ping_stagger` seconds in the order of `ports`, or started right away
+    once the previous attempt is refused. As soon as one port connects, the other attempts are cancelled.
+
+    Parameters:
+        ip: The IP address of the host.
+        ports: The ports to try, in order of preference.
+        concurrency: An optional controller to report the connection outcome to.
+
+    Returns:
+        The port that connected, or `None` if all attempts timed out.
+
+    Raises:
+        ConnectionRefusedError: If every port refused the connection.
+    """
+    stagger = settings.get("network_ping_stagger", 0.05)
+    timeout = settings.get("network_ping_timeout", 3)
+
+    start = time.monotonic()
+    tasks = []
+    pending = set()
+    errors = []
     try:
-        octet_end = int(octet_split[1])
-    except IndexError:
-        pass
-    if octet_end is None:
-        octet_end = int(octet_start)
+        for idx, port in enumerate(ports):
+            task = asyncio.create_task(_connect(ip, port))
+            tasks.append(task)
+            pending.add(task)
+            if idx == len(ports) - 1:
+                break
+            # give the preferred port a head start, unless it has already failed
+            done, pending = await asyncio.wait(
+                pending, timeout=stagger, return_when=asyncio.FIRST_COMPLETED
+            )
+            for t in done:
+                if t.exception() is None:
+                    return _record_ping(concurrency, start, t.result())
+                errors.append(t.exception())
+
+        while pending:
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for t in done:
+                if t.exception() is None:
+                    return _record_ping(concurrency, start, t.result())
+                errors.append(t.exception())
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if len(errors) == len(ports):
+        if concurrency is not None:
+            # a refused connection is a healthy, fast answer, a reset is not
+            concurrency.record(
+                latency=time.monotonic() - start,
+                reset=any(isinstance(e, ConnectionResetError) for e in errors),
+            )
+        raise ConnectionRefusedError from errors[0]
 
-    octet_val_start = min([octet_start, octet_end])
+    # ping failed if we time out
+    if concurrency is not None:
+        concurrency.record(timeout=True)
+    return None
 
-    return octet_val_start, octet_start, octet_end
+
+def _record_ping(
+    concurrency: Optional[AdaptiveConcurrency], start: float, port: int
+) -> int:
+    record_phase("connect", start)
+    if concurrency is not None:
+        concurrency.record(latency=time.monotonic() - start)
+    return port
+
+
+async def _connect(ip: ipaddress.ip_address, port: int) -> int:
+    reader, writer = await asyncio.open_connection(str(ip), port)
+    # immediately close connection, we know connection happened
+    writer.close()
+    # make sure the writer is closed
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return port
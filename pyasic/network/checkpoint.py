@@ -0,0 +1,123 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from pyasic import settings
+from pyasic.logger import logger
+from pyasic.network.hosts import HostSet
+
+
+class ScanCheckpoint:
+    """A checkpoint of a partially completed scan, used to resume the scan after an interruption.
+
+    The checkpoint stores the position in the scan order before which every host has been probed,
+    and the IPs of the miners found before that position.
+    A checkpoint only applies to the hosts and scan order it was created for, and is ignored if either changes.
+
+    Parameters:
+        path: The JSON file to load the checkpoint from and save it to.
+        hosts: The hosts being scanned.
+        order: A name for the order the hosts are scanned in.
+        interval: How often in seconds to save the checkpoint. Defaults to the `network_scan_checkpoint_interval` setting.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        hosts: HostSet,
+        order: str = "sequential",
+        interval: Optional[float] = None,
+    ):
+        self.path = Path(path)
+        self.hosts = hosts
+        self.order = order
+        if interval is None:
+            interval = settings.get("network_scan_checkpoint_interval", 10)
+        self.interval = interval
+
+        self.position = 0
+        # ip -> position in the scan order
+        self.found: Dict[str, int] = {}
+        self._last_save = time.monotonic()
+
+        if self.path.exists():
+            self.load()
+
+    @property
+    def fingerprint(self) -> str:
+        intervals = json.dumps([self.order, self.hosts.version, self.hosts.intervals])
+        return hashlib.sha256(intervals.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def found_ips(self) -> List[str]:
+        return list(self.found)
+
+    def add_miner(self, ip: str, position: int) -> None:
+        self.found[str(ip)] = position
+
+    def load(self) -> None:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Failed to load scan checkpoint from {self.path}: {e}")
+            return
+        if data.get("version") != self.VERSION:
+            return
+        if data.get("hosts") != self.fingerprint:
+            logger.info(f"Ignoring scan checkpoint {self.path}, the hosts changed.")
+            return
+        self.position = data["position"]
+        self.found = dict(data["found"])
+
+    def update(self, position: int) -> None:
+        """Move the checkpoint forward, and save it if `interval` has passed since it was last saved.
+
+        Parameters:
+            position: The position before which every host has been probed.
+        """
+        self.position = position
+        if time.monotonic() - self._last_save >= self.interval:
+            self.save()
+
+    def save(self) -> None:
+        # miners past the position will be found again on resume
+        found = {ip: idx for ip, idx in self.found.items() if idx < self.position}
+        data = {
+            "version": self.VERSION,
+            "hosts": self.fingerprint,
+            "position": self.position,
+            "found": found,
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        self._last_save = time.monotonic()
+
+    def clear(self) -> None:
+        """Remove the checkpoint, once the scan is complete."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,186 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import time
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+
+@dataclass
+class ConcurrencyDecision:
+    """A Dataclass recording a single limit change made by [`AdaptiveConcurrency`][pyasic.network.concurrency.AdaptiveConcurrency].
+
+    Attributes:
+        timestamp: The `time.monotonic()` value when the decision was made.
+        action: Either `"increase"` or `"decrease"`.
+        limit: The new in-flight limit.
+        samples: The number of probes the decision was based on.
+        timeout_rate: The fraction of those probes that timed out.
+        reset_rate: The fraction of those probes that were reset.
+        latency: The mean connect latency of the probes that got a response, in seconds.
+    """
+
+    timestamp: float
+    action: str
+    limit: int
+    samples: int
+    timeout_rate: float
+    reset_rate: float
+    latency: Optional[float] = None
+
+
+class AdaptiveConcurrency:
+    """An AIMD (additive increase, multiplicative decrease) controller for the number of in-flight scan probes.
+
+    Probe outcomes are grouped into epochs of roughly one window of probes.
+    After each epoch, the limit is raised by `increase` if the network looks healthy, or multiplied by `decrease`
+    if the timeout rate rises above the best rate seen so far, resets show up, or connect latency grows.
+
+    Parameters:
+        initial: The starting in-flight limit.
+        minimum: The lowest limit the controller will back off to.
+        maximum: The highest limit the controller will grow to.
+        increase: How much to add to the limit after a healthy epoch.
+        decrease: The factor to multiply the limit by after an unhealthy epoch.
+        timeout_tolerance: How far the timeout rate may rise above its baseline before backing off.
+        reset_tolerance: The reset rate that triggers a back off.
+        latency_factor: How many times the baseline connect latency is tolerated before backing off.
+    """
+
+    def __init__(
+        self,
+        initial: int = 300,
+        minimum: int = 10,
+        maximum: int = 3000,
+        increase: int = 25,
+        decrease: float = 0.5,
+        timeout_tolerance: float = 0.1,
+        reset_tolerance: float = 0.05,
+        latency_factor: float = 2.0,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.timeout_tolerance = timeout_tolerance
+        self.reset_tolerance = reset_tolerance
+        self.latency_factor = latency_factor
+
+        self.limit = max(minimum, min(initial, maximum))
+        self.history: List[ConcurrencyDecision] = []
+
+        self.baseline_timeout_rate = None
+        self.baseline_latency = None
+
+        self.total_samples = 0
+        self.total_timeouts = 0
+        self.total_resets = 0
+
+        self._reset_epoch()
+
+    def _reset_epoch(self):
+        self._samples = 0
+        self._timeouts = 0
+        self._resets = 0
+        self._latency_sum = 0.0
+        self._latency_count = 0
+
+    def record(
+        self,
+        latency: Optional[float] = None,
+        timeout: bool = False,
+        reset: bool = False,
+    ):
+        """Record the outcome of one connection attempt.
+
+        Parameters:
+            latency: How long the connection took to succeed or be refused, in seconds.
+            timeout: Whether the connection attempt timed out.
+            reset: Whether the connection was reset.
+        """
+        self._samples += 1
+        self.total_samples += 1
+        if timeout:
+            self._timeouts += 1
+            self.total_timeouts += 1
+        if reset:
+            self._resets += 1
+            self.total_resets += 1
+        if latency is not None:
+            self._latency_sum += latency
+            self._latency_count += 1
+
+        if self._samples >= max(self.limit, self.minimum):
+            self._adjust()
+
+    def _adjust(self):
+        timeout_rate = self._timeouts / self._samples
+        reset_rate = self._resets / self._samples
+        latency = None
+        if self._latency_count:
+            latency = self._latency_sum / self._latency_count
+
+        congested = reset_rate > self.reset_tolerance
+        if self.baseline_timeout_rate is not None:
+            if timeout_rate > self.baseline_timeout_rate + self.timeout_tolerance:
+                congested = True
+        if latency is not None and self.baseline_latency is not None:
+            if latency > self.baseline_latency * self.latency_factor:
+                congested = True
+
+        if congested:
+            action = "decrease"
+            self.limit = max(self.minimum, int(self.limit * self.decrease))
+        else:
+            action = "increase"
+            self.limit = min(self.maximum, self.limit + self.increase)
+            # only learn what "healthy" looks like from healthy epochs
+            if self.baseline_timeout_rate is None:
+                self.baseline_timeout_rate = timeout_rate
+            else:
+                self.baseline_timeout_rate = min(
+                    self.baseline_timeout_rate, timeout_rate
+                )
+            if latency is not None:
+                if self.baseline_latency is None:
+                    self.baseline_latency = latency
+                else:
+                    self.baseline_latency = min(self.baseline_latency, latency)
+
+        self.history.append(
+            ConcurrencyDecision(
+                timestamp=time.monotonic(),
+                action=action,
+                limit=self.limit,
+                samples=self._samples,
+                timeout_rate=timeout_rate,
+                reset_rate=reset_rate,
+                latency=latency,
+            )
+        )
+        self._reset_epoch()
+
+    @property
+    def stats(self) -> dict:
+        """The current limit, totals, and the decision history as a dict."""
+        return {
+            "limit": self.limit,
+            "samples": self.total_samples,
+            "timeouts": self.total_timeouts,
+            "resets": self.total_resets,
+            "baseline_timeout_rate": self.baseline_timeout_rate,
+            "baseline_latency": self.baseline_latency,
+            "history": [asdict(decision) for decision in self.history],
+        }
@@ -0,0 +1,336 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import bisect
+import ipaddress
+import itertools
+from typing import Iterable, Iterator, List, Tuple, Union
+
+AnyIPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+
+class HostSet:
+    """A sorted, de-duplicated set of IP addresses stored as integer intervals.
+
+    Hosts are never expanded in memory, so a `/8` costs the same as a single address.
+    Supports `len()`, `in`, iteration in ascending order, indexing, union (`|`) and exclusion (`-`).
+
+    Parameters:
+        intervals: An iterable of inclusive `(start, end)` integer address pairs.
+        version: The IP version of the addresses in this set.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = (), version: int = 4):
+        self._build(sorted(intervals), version)
+
+    def _build(self, sorted_intervals: Iterable[Tuple[int, int]], version: int):
+        self.version = version
+        self._intervals = self._merge(sorted_intervals)
+        self._offsets = list(
+            itertools.accumulate(end - start + 1 for start, end in self._intervals)
+        )
+
+    def __len__(self):
+        return self._offsets[-1] if self._offsets else 0
+
+    def __bool__(self):
+        return len(self._intervals) > 0
+
+    def __iter__(self) -> Iterator[AnyIPAddress]:
+        return self.iter_from(0)
+
+    def __contains__(self, item):
+        try:
+            address = ipaddress.ip_address(item)
+        except ValueError:
+            return False
+        if address.version != self.version:
+            return False
+        value = int(address)
+        idx = bisect.bisect_right(self._intervals, (value, float("inf"))) - 1
+        return idx >= 0 and self._intervals[idx][1] >= value
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[AnyIPAddress, "HostSet"]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("HostSet slices do not support steps")
+            return self.slice(start, stop)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("HostSet index out of range")
+        interval_idx = bisect.bisect_right(self._offsets, index)
+        start, _ = self._intervals[interval_idx]
+        prev_offset = self._offsets[interval_idx - 1] if interval_idx > 0 else 0
+        return self._to_address(start + index - prev_offset)
+
+    def index(self, item) -> int:
+        """Get the position of an address in this set.
+
+        Parameters:
+            item: An `ipaddress` address or address string.
+        """
+        address = ipaddress.ip_address(item)
+        if address.version != self.version:
+            raise ValueError(f"{item} is not in HostSet")
+        value = int(address)
+        idx = bisect.bisect_right(self._intervals, (value, float("inf"))) - 1
+        if idx < 0 or self._intervals[idx][1] < value:
+            raise ValueError(f"{item} is not in HostSet")
+        prev_offset = self._offsets[idx - 1] if idx > 0 else 0
+        return prev_offset + value - self._intervals[idx][0]
+
+    def __or__(self, other: "HostSet") -> "HostSet":
+        return self.union(other)
+
+    def __sub__(self, other: "HostSet") -> "HostSet":
+        return self.exclude(other)
+
+    def __eq__(self, other):
+        if isinstance(other, HostSet):
+            return self.version == other.version and self._intervals == other._intervals
+        try:
+            if len(other) != len(self):
+                return False
+            return all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        ranges = ", ".join(
+            str(self._to_address(s))
+            if s == e
+            else f"{self._to_address(s)}-{self._to_address(e)}"
+            for s, e in self._intervals[:5]
+        )
+        if len(self._intervals) > 5:
+            ranges += ", ..."
+        return f"{self.__class__.__name__}([{ranges}], hosts={len(self)})"
+
+    @property
+    def intervals(self) -> List[Tuple[int, int]]:
+        return list(self._intervals)
+
+    def iter_from(self, index: int) -> Iterator[AnyIPAddress]:
+        """Lazily iterate the hosts in this set, starting at a position.
+
+        Parameters:
+            index: The position of the first host to yield.
+        """
+        interval_idx = bisect.bisect_right(self._offsets, index)
+        for i in range(interval_idx, len(self._intervals)):
+            start, end = self._intervals[i]
+            if i == interval_idx:
+                prev_offset = self._offsets[i - 1] if i > 0 else 0
+                start += index - prev_offset
+            for value in range(start, end + 1):
+                yield self._to_address(value)
+
+    def iter_interleaved(self, prefix: int) -> Iterator[AnyIPAddress]:
+        """Lazily iterate the hosts in this set, alternating between subnets.
+
+        The first host of each subnet is yielded, then the second host of each subnet, and so on.
+
+        Parameters:
+            prefix: The prefix length of the subnets to alternate between, such as `24`.
+        """
+        bits = (32 if self.version == 4 else 128) - prefix
+        # subnet key -> the intervals of this set inside of it
+        groups = []
+        last_key = None
+        for start, end in self._intervals:
+            while start <= end:
+                key = start >> bits
+                block_end = min(end, ((key + 1) << bits) - 1)
+                if key != last_key:
+                    groups.append([])
+                    last_key = key
+                groups[-1].append((start, block_end))
+                start = block_end + 1
+
+        sizes = [sum(end - start + 1 for start, end in spans) for spans in groups]
+        for position in range(max(sizes, default=0)):
+            for spans, size in zip(groups, sizes):
+                if position >= size:
+                    continue
+                offset = position
+                for start, end in spans:
+                    if offset <= end - start:
+                        yield self._to_address(start + offset)
+                        break
+                    offset -= end - start + 1
+
+    def slice(self, start: int, stop: int) -> "HostSet":
+        """Get the hosts between two positions as a new HostSet.
+
+        Parameters:
+            start: The position of the first host to include.
+            stop: The position after the last host to include.
+        """
+        result = []
+        prev_offset = 0
+        for (int_start, int_end), offset in zip(self._intervals, self._offsets):
+            low = max(start, prev_offset)
+            high = min(stop, offset)
+            if low < high:
+                result.append(
+                    (int_start + low - prev_offset, int_start + high - prev_offset - 1)
+                )
+            prev_offset = offset
+        return self.__class__(result, version=self.version)
+
+    def split(self, count: int) -> List["HostSet"]:
+        """Split this set into contiguous chunks of nearly equal size.
+
+        Parameters:
+            count: The number of chunks to split into.
+        """
+        size = len(self)
+        return [
+            self.slice(size * i // count, size * (i + 1) // count) for i in range(count)
+        ]
+
+    def union(self, *others: "HostSet") -> "HostSet":
+        intervals = list(self._intervals)
+        version = self.version
+        for other in others:
+            self._check_version(other)
+            if other:
+                version = other.version
+            intervals.extend(other._intervals)
+        return self.__class__(intervals, version=version)
+
+    def exclude(self, other: "HostSet") -> "HostSet":
+        self._check_version(other)
+        result = []
+        excluded = other._intervals
+        idx = 0
+        for start, end in self._intervals:
+            # skip exclusions that end before this interval
+            while idx < len(excluded) and excluded[idx][1] < start:
+                idx += 1
+            j = idx
+            while j < len(excluded) and excluded[j][0] <= end:
+                ex_start, ex_end = excluded[j]
+                if ex_start > start:
+                    result.append((start, ex_start - 1))
+                start = max(start, ex_end + 1)
+                if start > end:
+                    break
+                j += 1
+            if start <= end:
+                result.append((start, end))
+        return self.__class__(result, version=self.version)
+
+    @classmethod
+    def from_addresses(cls, addresses: Iterable) -> "HostSet":
+        """Create a HostSet from individual addresses.
+
+        Parameters:
+            addresses: An iterable of `ipaddress` addresses or address strings.
+
+        Raises:
+            ValueError: If the addresses are not all of the same IP version.
+        """
+        version = None
+        intervals = []
+        for address in addresses:
+            address = ipaddress.ip_address(address)
+            if version is not None and address.version != version:
+                raise ValueError("Cannot combine addresses of different IP versions.")
+            version = address.version
+            intervals.append((int(address), int(address)))
+        if version is None:
+            version = 4
+        return cls(intervals, version=version)
+
+    @classmethod
+    def from_subnet(cls, subnet: str, hosts_only: bool = True) -> "HostSet":
+        """Create a HostSet from the addresses of a subnet.
+
+        Parameters:
+            subnet: A subnet string, such as `"10.0.0.1/24"`.
+            hosts_only: Whether to leave out the network and broadcast addresses.
+        """
+        network = ipaddress.ip_network(subnet, strict=False)
+        start = int(network.network_address)
+        end = int(network.broadcast_address)
+        if hosts_only and network.num_addresses > 2:
+            # the network and broadcast addresses are not hosts
+            start += 1
+            if network.version == 4:
+                end -= 1
+        return cls([(start, end)], version=network.version)
+
+    @classmethod
+    def from_octets(cls, oct_1: str, oct_2: str, oct_3: str, oct_4: str) -> "HostSet":
+        """Create a HostSet from 4 octet constructors, such as `"10"`, `"1-2"`, `"1"`, `"1-50"`."""
+        ranges = []
+        for octet in [oct_1, oct_2, oct_3, oct_4]:
+            low, start, end = compute_oct_range(octet)
+            high = max(start, end)
+            ranges.append((low, high))
+            if not 0 <= low <= high <= 255:
+                raise ValueError("Octet values must be between 0 and 255.")
+        (o1_lo, o1_hi), (o2_lo, o2_hi), (o3_lo, o3_hi), (o4_lo, o4_hi) = ranges
+
+        def _intervals():
+            for o1 in range(o1_lo, o1_hi + 1):
+                for o2 in range(o2_lo, o2_hi + 1):
+                    for o3 in range(o3_lo, o3_hi + 1):
+                        base = (o1 << 24) | (o2 << 16) | (o3 << 8)
+                        yield base + o4_lo, base + o4_hi
+
+        # intervals are generated in order, so they can be merged as they stream in
+        hosts = cls.__new__(cls)
+        hosts._build(_intervals(), version=4)
+        return hosts
+
+    def _to_address(self, value: int) -> AnyIPAddress:
+        if self.version == 4:
+            return ipaddress.IPv4Address(value)
+        return ipaddress.IPv6Address(value)
+
+    def _check_version(self, other: "HostSet"):
+        if other and self and other.version != self.version:
+            raise ValueError("Cannot combine HostSets of different IP versions.")
+
+    @staticmethod
+    def _merge(intervals: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        merged = []
+        for start, end in intervals:
+            if merged and start <= merged[-1][1] + 1:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+
+
+def compute_oct_range(octet: str) -> tuple:
+    octet_split = octet.split("-")
+    octet_start = int(octet_split[0])
+    octet_end = None
+    try:
+        octet_end = int(octet_split[1])
+    except IndexError:
+        pass
+    if octet_end is None:
+        octet_end = int(octet_start)
+
+    octet_val_start = min([octet_start, octet_end])
+
+    return octet_val_start, octet_start, octet_end
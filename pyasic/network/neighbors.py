@@ -0,0 +1,86 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import ipaddress
+from pathlib import Path
+from typing import Dict, Union
+
+from pyasic.logger import logger
+
+PROC_NET_ARP = "/proc/net/arp"
+
+# neighbor states from `ip neigh` that don't mean the host answered
+_DEAD_STATES = {"FAILED", "INCOMPLETE", "NOARP"}
+_EMPTY_MAC = "00:00:00:00:00:00"
+
+
+def parse_neighbors(dump: str) -> Dict[str, str]:
+    """Parse a neighbor table dump into the IPs and MAC addresses of hosts known to be live.
+
+    Both the format of `/proc/net/arp` and the output of `ip neigh` are understood.
+    Incomplete and failed entries are skipped.
+
+    Parameters:
+        dump: The contents of `/proc/net/arp`, or the output of `ip neigh`.
+
+    Returns:
+        A dict of IP address to upper case MAC address.
+    """
+    neighbors = {}
+    for line in dump.splitlines():
+        fields = line.split()
+        if not fields:
+            continue
+        try:
+            ip = str(ipaddress.ip_address(fields[0]))
+        except ValueError:
+            # header line
+            continue
+
+        mac = None
+        if "lladdr" in fields:
+            # ip neigh: <ip> dev <dev> lladdr <mac> [router] <STATE>
+            if fields[-1] in _DEAD_STATES:
+                continue
+            idx = fields.index("lladdr") + 1
+            if idx < len(fields):
+                mac = fields[idx]
+        elif len(fields) >= 4 and fields[2].startswith("0x"):
+            # /proc/net/arp: <ip> <hw type> <flags> <mac> <mask> <dev>
+            if not int(fields[2], 16) & 0x2:
+                continue
+            mac = fields[3]
+
+        if mac is None or mac == _EMPTY_MAC:
+            continue
+        neighbors[ip] = mac.upper()
+    return neighbors
+
+
+def read_neighbors(path: Union[str, Path] = PROC_NET_ARP) -> Dict[str, str]:
+    """Read the neighbor table from a file, by default the kernel's ARP table.
+
+    Parameters:
+        path: The file to read, in the format of `/proc/net/arp` or the output of `ip neigh`.
+
+    Returns:
+        A dict of IP address to upper case MAC address, which is empty if the file can't be read.
+    """
+    try:
+        with open(path) as f:
+            return parse_neighbors(f.read())
+    except OSError as e:
+        logger.warning(f"Failed to read neighbor table {path}: {e}")
+        return {}
@@ -0,0 +1,169 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import bisect
+import inspect
+import time
+from typing import Callable, Dict, List, Optional
+
+# upper bounds of the histogram buckets, in seconds
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+
+class LatencyHistogram:
+    """A fixed-bucket histogram of latencies.
+
+    Parameters:
+        buckets: The upper bounds of the buckets in seconds. Anything slower goes in a final overflow bucket.
+    """
+
+    def __init__(self, buckets: List[float] = None):
+        self.buckets = buckets if buckets is not None else LATENCY_BUCKETS
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Estimate a percentile as the upper bound of the bucket it falls in.
+
+        Parameters:
+            percent: The percentile to estimate, from 0 to 100.
+        """
+        if not self.count:
+            return None
+        target = self.count * percent / 100
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": dict(zip([*self.buckets, "inf"], self.counts)),
+        }
+
+
+class ScanProgress:
+    """Progress and timing information for a running scan.
+
+    Phase timings are collected for `connect`, and from [`MinerFactory`][pyasic.miners.miner_factory.MinerFactory]
+    for `inventory`, `type`, `model` and `boser` detection.
+
+    Parameters:
+        total: The number of hosts to be probed.
+        callback: An optional function called with this object as the scan progresses. It may be a coroutine function.
+        interval: The minimum number of seconds between calls to `callback`.
+    """
+
+    def __init__(
+        self,
+        total: int,
+        callback: Callable[["ScanProgress"], None] = None,
+        interval: float = 0.5,
+    ):
+        self.total = total
+        self.callback = callback
+        self.interval = interval
+
+        self.probed = 0
+        self.alive = 0
+        self.identified = 0
+        self.phases: Dict[str, LatencyHistogram] = {}
+
+        self.started = time.monotonic()
+        self.finished = None
+        self._last_notify = None
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished if self.finished is not None else time.monotonic()
+        return end - self.started
+
+    @property
+    def rate(self) -> float:
+        """Hosts probed per second."""
+        elapsed = self.elapsed
+        return self.probed / elapsed if elapsed else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds until the scan is complete."""
+        if self.finished is not None:
+            return 0.0
+        if not self.probed:
+            return None
+        return (self.total - self.probed) / self.rate
+
+    def record_phase(self, phase: str, seconds: float) -> None:
+        if phase not in self.phases:
+            self.phases[phase] = LatencyHistogram()
+        self.phases[phase].add(seconds)
+        if phase == "connect":
+            self.alive += 1
+
+    def record_probe(self, identified: bool) -> None:
+        self.probed += 1
+        if identified:
+            self.identified += 1
+
+    async def notify(self, force: bool = False) -> None:
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if not force and self._last_notify is not None:
+            if now - self._last_notify < self.interval:
+                return
+        self._last_notify = now
+        result = self.callback(self)
+        if inspect.isawaitable(result):
+            await result
+
+    async def finish(self) -> None:
+        self.finished = time.monotonic()
+        await self.notify(force=True)
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "probed": self.probed,
+            "alive": self.alive,
+            "identified": self.identified,
+            "elapsed": self.elapsed,
+            "rate": self.rate,
+            "eta": self.eta,
+            "phases": {name: hist.as_dict() for name, hist in self.phases.items()},
+        }
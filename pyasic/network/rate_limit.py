@@ -0,0 +1,81 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import asyncio
+import ipaddress
+import time
+from typing import Dict, List
+
+
+class SubnetRateLimiter:
+    """A set of token buckets limiting how fast probes are sent into each subnet.
+
+    Parameters:
+        rate: The number of probes per second allowed into each subnet.
+        burst: The number of probes that may be sent into an idle subnet at once.
+        prefix: The prefix length that defines a subnet, such as `24`.
+    """
+
+    # drop idle buckets once there are this many
+    MAX_IDLE_BUCKETS = 4096
+
+    def __init__(self, rate: float, burst: int = 10, prefix: int = 24):
+        if rate <= 0:
+            raise ValueError("Subnet rate must be greater than 0.")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.prefix = prefix
+        # subnet key -> [tokens, last refill time]
+        self._buckets: Dict[int, List[float]] = {}
+        self.waits = 0
+
+    def _key(self, ip: ipaddress.ip_address) -> int:
+        ip = ipaddress.ip_address(ip)
+        return int(ip) >> (ip.max_prefixlen - self.prefix)
+
+    def _take(self, key: int) -> float:
+        # returns how long to wait for a token, or 0 if one was taken
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_IDLE_BUCKETS:
+                self._prune(now)
+            bucket = self._buckets[key] = [float(self.burst), now]
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0
+        return (1 - bucket[0]) / self.rate
+
+    def _prune(self, now: float) -> None:
+        # a full bucket is the same as a missing one
+        for key, (tokens, last) in list(self._buckets.items()):
+            if tokens + (now - last) * self.rate >= self.burst:
+                del self._buckets[key]
+
+    async def acquire(self, ip: ipaddress.ip_address) -> None:
+        """Wait until a probe may be sent to an IP.
+
+        Parameters:
+            ip: The IP address that will be probed.
+        """
+        key = self._key(ip)
+        while True:
+            wait = self._take(key)
+            if not wait:
+                return
+            self.waits += 1
+            await asyncio.sleep(wait)
@@ -0,0 +1,178 @@
+# ------------------------------------------------------------------------------
+#  Copyright 2022 Upstream Data Inc                                            -
+#                                                                              -
+#  Licensed under the Apache License, Version 2.0 (the "License");             -
+#  you may not use this file except in compliance with the License.            -
+#  You may obtain a copy of the License at                                     -
+#                                                                              -
+#      http://www.apache.org/licenses/LICENSE-2.0                              -
+#                                                                              -
+#  Unless required by applicable law or agreed to in writing, software         -
+#  distributed under the License is distributed on an "AS IS" BASIS,           -
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    -
+#  See the License for the specific language governing permissions and         -
+#  limitations under the License.                                              -
+# ------------------------------------------------------------------------------
+import asyncio
+import multiprocessing
+import os
+import queue
+import traceback
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pyasic import settings
+from pyasic.logger import logger
+from pyasic.miners.inventory import InventoryEntry
+from pyasic.network.hosts import HostSet
+
+# (ip, miner_type, model, firmware, boser), miner_type is None for unknown miners
+ShardResult = Tuple[str, Optional[str], Optional[str], Optional[str], Optional[bool]]
+
+_SHARD_DONE = "done"
+
+
+class ShardError(Exception):
+    """A scan worker process failed, so the results of its shard are incomplete.
+
+    Attributes:
+        shard: The index of the failed shard.
+        details: The traceback from the worker, if it could send one.
+    """
+
+    def __init__(self, shard: int, details: Optional[str] = None):
+        super().__init__(shard, details)
+        self.shard = shard
+        self.details = details
+
+    def __str__(self):
+        if self.details:
+            return f"Scan worker {self.shard} failed:\n{self.details}"
+        return f"Scan worker {self.shard} failed."
+
+
+def _scan_shard(
+    shard: int,
+    intervals: List[Tuple[int, int]],
+    version: int,
+    shard_settings: dict,
+    inventory_path: Optional[str],
+    results: multiprocessing.Queue,
+) -> None:
+    # imported here, the worker is a fresh interpreter
+    from pyasic.miners.inventory import MinerInventory
+    from pyasic.miners.miner_factory import miner_factory
+    from pyasic.network import MinerNetwork
+
+    for key, val in shard_settings.items():
+        settings.update(key, val)
+    # the worker only reads the inventory, the parent keeps it up to date
+    miner_factory.inventory = MinerInventory(inventory_path)
+
+    async def scan():
+        network = MinerNetwork(HostSet(intervals, version=version))
+        async for miner in network.scan_network_generator():
+            if miner is None:
+                continue
+            entry = miner_factory.inventory.get(miner.ip)
+            result: ShardResult = (str(miner.ip), None, None, None, None)
+            if entry is not None:
+                result = (
+                    entry.ip,
+                    entry.miner_type,
+                    entry.model,
+                    entry.firmware,
+                    entry.boser,
+                )
+            results.put((shard, result))
+
+    try:
+        asyncio.run(scan())
+    except Exception:
+        # send the traceback, the exception itself may not pickle
+        results.put((shard, ShardError(shard, traceback.format_exc())))
+    else:
+        results.put((shard, _SHARD_DONE))
+
+
+async def sharded_scan(
+    hosts: HostSet, processes: Optional[int] = None
+) -> AsyncIterator[InventoryEntry]:
+    """Scan hosts from several worker processes, each with its own event loop and [`MinerFactory`][pyasic.miners.miner_factory.MinerFactory].
+
+    The hosts are split into one contiguous shard per process, and each found miner is sent back as a compact tuple.
+
+    Parameters:
+        hosts: The hosts to scan.
+        processes: The number of worker processes. Defaults to the `network_scan_processes` setting, or the CPU count.
+
+    Returns:
+        An asynchronous generator of [`InventoryEntry`][pyasic.miners.inventory.InventoryEntry] for each found miner.
+        Entries with a `miner_type` of `None` are hosts that could not be identified.
+
+    Raises:
+        ShardError: If a worker process fails, rather than returning the partial results of its shard.
+    """
+    from pyasic.miners.miner_factory import miner_factory
+
+    if processes is None:
+        processes = settings.get("network_scan_processes") or os.cpu_count() or 1
+    shards = [shard for shard in hosts.split(processes) if shard]
+
+    inventory_path = None
+    if miner_factory.inventory is not None and miner_factory.inventory.path:
+        inventory_path = str(miner_factory.inventory.path)
+
+    # spawn, so workers don't inherit the parent's running event loop
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    workers = [
+        ctx.Process(
+            target=_scan_shard,
+            args=(
+                idx,
+                shard.intervals,
+                shard.version,
+                dict(settings._settings),
+                inventory_path,
+                results,
+            ),
+            daemon=True,
+        )
+        for idx, shard in enumerate(shards)
+    ]
+    for worker in workers:
+        worker.start()
+
+    loop = asyncio.get_running_loop()
+    running = set(range(len(workers)))
+    try:
+        while running:
+            try:
+                shard, result = await loop.run_in_executor(None, results.get, True, 1)
+            except queue.Empty:
+                # make sure a crashed worker can't stall the scan
+                for idx in list(running):
+                    if not workers[idx].is_alive() and results.empty():
+                        raise ShardError(
+                            idx, f"exited with code {workers[idx].exitcode}"
+                        )
+                continue
+            if isinstance(result, ShardError):
+                logger.error(str(result))
+                raise result
+            if result == _SHARD_DONE:
+                running.discard(shard)
+                continue
+            ip, miner_type, model, firmware, boser = result
+            yield InventoryEntry(
+                ip=ip,
+                miner_type=miner_type,
+                model=model,
+                firmware=firmware,
+                boser=boser,
+            )
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
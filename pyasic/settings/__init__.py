@@ -24,11 +24,41 @@ from httpx import AsyncHTTPTransport
 _settings = {  # defaults
     "network_ping_retries": 1,
     "network_ping_timeout": 3,
+    "network_ping_stagger": 0.05,
     "network_scan_threads": 300,
+    "network_scan_adaptive": False,
+    "network_scan_min_threads": 10,
+    "network_scan_max_threads": 3000,
+    "network_scan_checkpoint_interval": 10,
+    "network_scan_processes": None,
+    "network_scan_subnet_rate": None,
+    "network_scan_subnet_burst": 10,
+    "network_scan_subnet_prefix": 24,
+    "network_scan_progress_interval": 0.5,
+    "network_scan_neighbors": None,
+    "network_scan_neighbors_only": False,
     "factory_get_retries": 1,
     "factory_get_timeout": 3,
+    "factory_subnet_affinity": True,
+    "factory_probe_timeout": 0.5,
+    "factory_cache_size": 65536,
+    "factory_cache_ttl": 3600,
+    "factory_cache_negative_ttl": 30,
+    "factory_cache_max_negative_ttl": 600,
+    "factory_web_max_connections": 1000,
+    "factory_web_max_keepalive": 100,
+    "factory_web_keepalive_expiry": 5,
+    "factory_web_fingerprint_bytes": 8192,
+    "factory_web_https_delay": 0.25,
     "get_data_retries": 1,
     "api_function_timeout": 5,
+    "api_max_response_size": 1048576,
+    "api_json_decoder": "json",
+    "api_capability_ttl": 3600,
+    "api_capability_retry": 300,
+    "btminer_token_offload": False,
+    "host_connection_limit": None,
+    "host_connection_limits": {},
     "default_whatsminer_password": "admin",
     "default_innosilicon_password": "admin",
     "default_antminer_password": "root",
@@ -42,12 +72,16 @@ _settings = {  # defaults
 ssl_cxt = httpx.create_ssl_context()
 
 
-def transport(verify: Union[str, bool, SSLContext] = ssl_cxt):
+def transport(
+    verify: Union[str, bool, SSLContext] = ssl_cxt, limits: httpx.Limits = None
+):
     l_onoff = 1
     l_linger = get("so_linger_time", 1000)
 
     opts = [(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", l_onoff, l_linger))]
 
+    if limits is not None:
+        return AsyncHTTPTransport(socket_options=opts, verify=verify, limits=limits)
     return AsyncHTTPTransport(socket_options=opts, verify=verify)
 
 
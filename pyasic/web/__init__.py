@@ -16,17 +16,30 @@
 import ipaddress
 import warnings
 from abc import ABC, abstractmethod
-from typing import Union
+from typing import FrozenSet, Optional, Union
 
+from pyasic.API.registry import CommandRegistry, build_command_registry
 from pyasic.errors import APIWarning
 
 
 class BaseWebAPI(ABC):
+    # names of commands that need privileged access, and of commands that change the state of the miner
+    _privileged_commands: FrozenSet[str] = frozenset()
+    _mutating_commands: FrozenSet[str] = frozenset()
+    # the commands of the class, built when it is created
+    command_registry: CommandRegistry = CommandRegistry([])
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.command_registry = build_command_registry(cls, BaseWebAPI)
+
     def __init__(self, ip: str) -> None:
         # ip address of the miner
         self.ip = ip  # ipaddress.ip_address(ip)
         self.username = "root"
         self.pwd = "root"
+        # the make of the miner, which picks its connection limit
+        self.vendor: Optional[str] = None
 
     def __new__(cls, *args, **kwargs):
         if cls is BaseWebAPI:
@@ -53,7 +66,7 @@ class BaseWebAPI(ABC):
         pass
 
     def _check_commands(self, *commands):
-        allowed_commands = self.get_commands()
+        allowed_commands = self.command_registry
         return_commands = []
         for command in [*commands]:
             if command in allowed_commands:
@@ -76,18 +89,4 @@ If you are sure you want to use this command please use WebAPI.send_command("{co
         Returns:
             A list of all web commands that the miner supports.
         """
-        return [
-            func
-            for func in
-            # each function in self
-            dir(self)
-            if not func == "commands"
-            if callable(getattr(self, func)) and
-            # no __ or _ methods
-            not func.startswith("__") and not func.startswith("_") and
-            # remove all functions that are in this base class
-            func
-            not in [
-                func for func in dir(BaseWebAPI) if callable(getattr(BaseWebAPI, func))
-            ]
-        ]
+        return list(self.command_registry)
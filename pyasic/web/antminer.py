@@ -20,10 +20,15 @@ from typing import Union
 import httpx
 
 from pyasic import settings
+from pyasic.limiter import host_limiter
 from pyasic.web import BaseWebAPI
 
 
 class AntminerModernWebAPI(BaseWebAPI):
+    _mutating_commands = frozenset(
+        {"blink", "reboot", "set_miner_conf", "set_network_conf"}
+    )
+
     def __init__(self, ip: str) -> None:
         super().__init__(ip)
         self.pwd = settings.get("default_antminer_password", "root")
@@ -38,7 +43,9 @@ class AntminerModernWebAPI(BaseWebAPI):
         url = f"http://{self.ip}/cgi-bin/{command}.cgi"
         auth = httpx.DigestAuth(self.username, self.pwd)
         try:
-            async with httpx.AsyncClient(transport=settings.transport()) as client:
+            async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+                transport=settings.transport()
+            ) as client:
                 if parameters:
                     data = await client.post(
                         url,
@@ -79,7 +86,8 @@ class AntminerModernWebAPI(BaseWebAPI):
 
         try:
             url = f"http://{self.ip}/cgi-bin/{command}.cgi"
-            ret = await client.get(url, auth=auth)
+            async with host_limiter.connection(self.ip, self.vendor):
+                ret = await client.get(url, auth=auth)
         except httpx.HTTPError:
             pass
         else:
@@ -138,6 +146,8 @@ class AntminerModernWebAPI(BaseWebAPI):
 
 
 class AntminerOldWebAPI(BaseWebAPI):
+    _mutating_commands = frozenset({"blink", "reboot", "set_miner_conf"})
+
     def __init__(self, ip: str) -> None:
         super().__init__(ip)
         self.pwd = settings.get("default_antminer_password", "root")
@@ -152,7 +162,9 @@ class AntminerOldWebAPI(BaseWebAPI):
         url = f"http://{self.ip}/cgi-bin/{command}.cgi"
         auth = httpx.DigestAuth(self.username, self.pwd)
         try:
-            async with httpx.AsyncClient(transport=settings.transport()) as client:
+            async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+                transport=settings.transport()
+            ) as client:
                 if parameters:
                     data = await client.post(
                         url,
@@ -176,7 +188,9 @@ class AntminerOldWebAPI(BaseWebAPI):
     ) -> dict:
         data = {k: None for k in commands}
         auth = httpx.DigestAuth(self.username, self.pwd)
-        async with httpx.AsyncClient(transport=settings.transport()) as client:
+        async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+            transport=settings.transport()
+        ) as client:
             for command in commands:
                 try:
                     url = f"http://{self.ip}/cgi-bin/{command}.cgi"
@@ -15,7 +15,7 @@
 # ------------------------------------------------------------------------------
 import json
 from datetime import timedelta
-from typing import Union
+from typing import Optional, Union
 
 import httpx
 from betterproto import Message
@@ -23,6 +23,7 @@ from grpclib.client import Channel
 
 from pyasic import settings
 from pyasic.errors import APIError
+from pyasic.limiter import host_limiter
 from pyasic.web import BaseWebAPI
 
 from .proto.braiins.bos import *
@@ -64,6 +65,18 @@ class BOSMinerWebAPI(BaseWebAPI):
         if self.grpc is not None:
             self.grpc.pwd = other
 
+    @property
+    def vendor(self):
+        return self.luci.vendor
+
+    @vendor.setter
+    def vendor(self, other: Optional[str]):
+        self.luci.vendor = other
+        if self.gql is not None:
+            self.gql.vendor = other
+        if self.grpc is not None:
+            self.grpc.vendor = other
+
     async def send_command(
         self,
         command: Union[str, dict],
@@ -120,6 +133,7 @@ class BOSMinerGQLAPI:
         self.ip = ip
         self.username = "root"
         self.pwd = pwd
+        self.vendor: Optional[str] = None
 
     async def multicommand(self, *commands: dict) -> dict:
         def merge(*d: dict):
@@ -159,7 +173,9 @@ class BOSMinerGQLAPI:
         if command.get("query") is None:
             query = {"query": self.parse_command(command)}
         try:
-            async with httpx.AsyncClient(transport=settings.transport()) as client:
+            async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+                transport=settings.transport()
+            ) as client:
                 await self.auth(client)
                 data = await client.post(url, json=query)
         except httpx.HTTPError:
@@ -205,6 +221,7 @@ class BOSMinerLuCIAPI:
         self.ip = ip
         self.username = "root"
         self.pwd = pwd
+        self.vendor: Optional[str] = None
 
     async def multicommand(self, *commands: str) -> dict:
         data = {}
@@ -214,7 +231,9 @@ class BOSMinerLuCIAPI:
 
     async def send_command(self, path: str, ignore_errors: bool = False) -> dict:
         try:
-            async with httpx.AsyncClient(transport=settings.transport()) as client:
+            async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+                transport=settings.transport()
+            ) as client:
                 await self.auth(client)
                 data = await client.get(
                     f"http://{self.ip}{path}", headers={"User-Agent": "BTC Tools v0.1"}
@@ -282,6 +301,7 @@ class BOSMinerGRPCAPI:
         self.ip = ip
         self.username = "root"
         self.pwd = pwd
+        self.vendor: Optional[str] = None
         self._auth = None
         self._auth_time = datetime.now()
 
@@ -315,7 +335,9 @@ class BOSMinerGRPCAPI:
         metadata = []
         if auth:
             metadata.append(("authorization", await self.auth()))
-        async with Channel(self.ip, 50051) as c:
+        async with host_limiter.connection(self.ip, self.vendor), Channel(
+            self.ip, 50051
+        ) as c:
             endpoint = getattr(BOSMinerGRPCStub(c), command)
             if endpoint is None:
                 if not ignore_errors:
@@ -332,7 +354,9 @@ class BOSMinerGRPCAPI:
         return self._auth
 
     async def _get_auth(self):
-        async with Channel(self.ip, 50051) as c:
+        async with host_limiter.connection(self.ip, self.vendor), Channel(
+            self.ip, 50051
+        ) as c:
             req = LoginRequest(username=self.username, password=self.pwd)
             async with c.request(
                 "/braiins.bos.v1.AuthenticationService/Login",
@@ -21,10 +21,22 @@ import httpx
 
 from pyasic import settings
 from pyasic.errors import APIError, APIWarning
+from pyasic.limiter import host_limiter
 from pyasic.web import BaseWebAPI
 
 
 class ePICWebAPI(BaseWebAPI):
+    _mutating_commands = frozenset(
+        {
+            "pause_mining",
+            "reboot",
+            "restart_epic",
+            "resume_mining",
+            "start_mining",
+            "stop_mining",
+        }
+    )
+
     def __init__(self, ip: str) -> None:
         super().__init__(ip)
         self.username = "root"
@@ -42,7 +54,9 @@ class ePICWebAPI(BaseWebAPI):
         if post or parameters != {}:
             post = True
 
-        async with httpx.AsyncClient(transport=settings.transport()) as client:
+        async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+            transport=settings.transport()
+        ) as client:
             for i in range(settings.get("get_data_retries", 1) + 1):
                 try:
                     if post:
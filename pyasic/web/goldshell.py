@@ -20,10 +20,13 @@ from typing import Union
 import httpx
 
 from pyasic import settings
+from pyasic.limiter import host_limiter
 from pyasic.web import BaseWebAPI
 
 
 class GoldshellWebAPI(BaseWebAPI):
+    _mutating_commands = frozenset({"delpool", "newpool"})
+
     def __init__(self, ip: str) -> None:
         super().__init__(ip)
         self.username = "admin"
@@ -31,7 +34,9 @@ class GoldshellWebAPI(BaseWebAPI):
         self.jwt = None
 
     async def auth(self):
-        async with httpx.AsyncClient(transport=settings.transport()) as client:
+        async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+            transport=settings.transport()
+        ) as client:
             try:
                 await client.get(f"http://{self.ip}/user/logout")
                 auth = (
@@ -71,7 +76,9 @@ class GoldshellWebAPI(BaseWebAPI):
             parameters.pop("pool_pwd")
         if not self.jwt:
             await self.auth()
-        async with httpx.AsyncClient(transport=settings.transport()) as client:
+        async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+            transport=settings.transport()
+        ) as client:
             for i in range(settings.get("get_data_retries", 1)):
                 try:
                     if parameters:
@@ -102,7 +109,9 @@ class GoldshellWebAPI(BaseWebAPI):
         data = {k: None for k in commands}
         data["multicommand"] = True
         await self.auth()
-        async with httpx.AsyncClient(transport=settings.transport()) as client:
+        async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+            transport=settings.transport()
+        ) as client:
             for command in commands:
                 try:
                     response = await client.get(
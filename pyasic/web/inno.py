@@ -21,10 +21,15 @@ import httpx
 
 from pyasic import settings
 from pyasic.errors import APIError
+from pyasic.limiter import host_limiter
 from pyasic.web import BaseWebAPI
 
 
 class InnosiliconWebAPI(BaseWebAPI):
+    _mutating_commands = frozenset(
+        {"poweroff", "reboot", "restart_cgminer", "update_pools"}
+    )
+
     def __init__(self, ip: str) -> None:
         super().__init__(ip)
         self.username = "admin"
@@ -32,7 +37,9 @@ class InnosiliconWebAPI(BaseWebAPI):
         self.jwt = None
 
     async def auth(self):
-        async with httpx.AsyncClient(transport=settings.transport()) as client:
+        async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+            transport=settings.transport()
+        ) as client:
             try:
                 auth = await client.post(
                     f"http://{self.ip}/api/auth",
@@ -54,7 +61,9 @@ class InnosiliconWebAPI(BaseWebAPI):
     ) -> dict:
         if not self.jwt:
             await self.auth()
-        async with httpx.AsyncClient(transport=settings.transport()) as client:
+        async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+            transport=settings.transport()
+        ) as client:
             for i in range(settings.get("get_data_retries", 1)):
                 try:
                     response = await client.post(
@@ -90,7 +99,9 @@ class InnosiliconWebAPI(BaseWebAPI):
         data = {k: None for k in commands}
         data["multicommand"] = True
         await self.auth()
-        async with httpx.AsyncClient(transport=settings.transport()) as client:
+        async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+            transport=settings.transport()
+        ) as client:
             for command in commands:
                 try:
                     response = await client.post(
@@ -20,10 +20,22 @@ from typing import Union
 import httpx
 
 from pyasic import settings
+from pyasic.limiter import host_limiter
 from pyasic.web import BaseWebAPI
 
 
 class VNishWebAPI(BaseWebAPI):
+    _mutating_commands = frozenset(
+        {
+            "pause_mining",
+            "reboot",
+            "restart_vnish",
+            "resume_mining",
+            "start_mining",
+            "stop_mining",
+        }
+    )
+
     def __init__(self, ip: str) -> None:
         super().__init__(ip)
         self.username = "admin"
@@ -31,7 +43,9 @@ class VNishWebAPI(BaseWebAPI):
         self.token = None
 
     async def auth(self):
-        async with httpx.AsyncClient(transport=settings.transport()) as client:
+        async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+            transport=settings.transport()
+        ) as client:
             try:
                 auth = await client.post(
                     f"http://{self.ip}/api/v1/unlock",
@@ -58,7 +72,9 @@ class VNishWebAPI(BaseWebAPI):
     ) -> dict:
         if not self.token:
             await self.auth()
-        async with httpx.AsyncClient(transport=settings.transport()) as client:
+        async with host_limiter.connection(self.ip, self.vendor), httpx.AsyncClient(
+            transport=settings.transport()
+        ) as client:
             for i in range(settings.get("get_data_retries", 1)):
                 try:
                     auth = self.token
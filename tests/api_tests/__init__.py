@@ -13,18 +13,28 @@
 #  See the License for the specific language governing permissions and         -
 #  limitations under the License.                                              -
 # ------------------------------------------------------------------------------
+import asyncio
 import json
 import time
 import unittest
 from unittest.mock import patch
 
-from pyasic import APIError
+from pyasic import APIError, APIWarning, settings
 from pyasic.API.bfgminer import BFGMinerAPI
 from pyasic.API.bmminer import BMMinerAPI
 from pyasic.API.bosminer import BOSMinerAPI
-from pyasic.API.btminer import BTMinerAPI
+from pyasic.API.btminer import (
+    BTMinerAPI,
+    create_privileged_cmd,
+    parse_btminer_priviledge_data,
+)
+from pyasic.API.capabilities import capability_cache
 from pyasic.API.cgminer import CGMinerAPI
+from pyasic.API.decoding import load_api_data
+from pyasic.API.framing import ResponseBuffer
 from pyasic.API.luxminer import LUXMinerAPI
+from pyasic.limiter import host_limiter
+from pyasic.miners.whatsminer import BTMinerM30SV10
 
 
 class TestAPIBase(unittest.IsolatedAsyncioTestCase):
@@ -148,5 +158,280 @@ class TestLuxOSAPI(TestAPIBase):
         self.api_str = "LuxOS"
 
 
+class TestCommandRegistry(unittest.TestCase):
+    def test_command_metadata(self):
+        registry = BTMinerAPI.command_registry
+        self.assertIn("summary", registry)
+        self.assertNotIn("send_command", registry)
+        self.assertTrue(registry["summary"].read_only)
+        self.assertFalse(registry["summary"].privileged)
+        self.assertTrue(registry["set_fan_zero_speed"].privileged)
+        self.assertFalse(registry["set_fan_zero_speed"].read_only)
+        self.assertEqual(registry["set_fan_zero_speed"].min_api_version, "2.0.5")
+        self.assertIn("addpool", CGMinerAPI.command_registry.mutating)
+
+        api = CGMinerAPI("10.0.0.50")
+        self.assertEqual(api.get_commands(), list(CGMinerAPI.command_registry))
+        with self.assertWarns(APIWarning):
+            self.assertEqual(api._check_commands("summary", "bad"), ["summary"])
+
+
+class TestMulticommandCapabilities(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        capability_cache.clear()
+
+    def tearDown(self):
+        capability_cache.clear()
+
+    async def test_joined_multicommand_memo(self):
+        async def send_command(command, **kwargs):
+            if "+" in command:
+                raise APIError("Invalid command")
+            return {"STATUS": [{"STATUS": "S"}], command.upper(): [{}], "id": 1}
+
+        for api_cls in [BMMinerAPI, CGMinerAPI, BFGMinerAPI]:
+            with self.subTest(api=api_cls.__name__):
+                with patch.object(api_cls, "send_command", side_effect=send_command):
+                    api = api_cls("10.0.0.50")
+                    await api.multicommand("summary", "pools")
+                    self.assertEqual(api.send_command.call_count, 3)
+                    await api.multicommand("summary", "pools")
+                    # the joined command isn't tried again
+                    self.assertEqual(api.send_command.call_count, 5)
+
+    async def test_unsupported_command_memo(self):
+        sent = []
+
+        async def send_command(command, **kwargs):
+            sent.append(command)
+            if "tunerstatus" in command:
+                raise APIError("tunerstatus: Invalid command")
+            return {"summary": [{}], "id": 1}
+
+        with patch.object(BOSMinerAPI, "send_command", side_effect=send_command):
+            api = BOSMinerAPI("10.0.0.50")
+            await api.multicommand("summary", "tunerstatus")
+            await api.multicommand("summary", "tunerstatus")
+        self.assertEqual(sent, ["summary+tunerstatus", "summary", "summary"])
+
+    async def test_transient_errors_not_remembered(self):
+        sent = []
+
+        async def send_command(command, **kwargs):
+            sent.append(command)
+            if "pools" in command and isinstance(api, BOSMinerAPI):
+                raise APIError("pools: Busy")
+            if "+" in command:
+                raise APIError("Socket connect failed: timed out")
+            return {"STATUS": [{"STATUS": "S"}], command.upper(): [{}], "id": 1}
+
+        with patch.object(CGMinerAPI, "send_command", side_effect=send_command):
+            api = CGMinerAPI("10.0.0.50")
+            await api.multicommand("summary", "pools")
+            await api.multicommand("summary", "pools")
+        # the joined command is tried on every poll
+        self.assertEqual(sent.count("summary+pools"), 2)
+        self.assertIsNone(api._multicommand_capabilities().joined)
+
+        sent.clear()
+        with patch.object(BOSMinerAPI, "send_command", side_effect=send_command):
+            api = BOSMinerAPI("10.0.0.50")
+            await api.multicommand("summary", "pools")
+        self.assertEqual(sent, ["summary+pools", "summary"])
+        self.assertFalse(api._multicommand_capabilities().is_unsupported("pools"))
+
+    async def test_unsupported_command_retried(self):
+        with patch.object(BOSMinerAPI, "send_command") as send_command:
+            send_command.side_effect = APIError("tunerstatus: Invalid command")
+            api = BOSMinerAPI("10.0.0.50")
+            await api.multicommand("summary", "tunerstatus")
+        capabilities = api._multicommand_capabilities()
+        self.assertTrue(capabilities.is_unsupported("tunerstatus"))
+        with patch("time.monotonic", return_value=time.monotonic() + 301):
+            self.assertFalse(capabilities.is_unsupported("tunerstatus"))
+
+
+class TestBTMinerToken(unittest.IsolatedAsyncioTestCase):
+    async def test_token_single_flight(self):
+        async def send_command(command, **kwargs):
+            await asyncio.sleep(0.01)
+            return {"Msg": {"salt": "BQ5hoXV9", "time": "4183", "newsalt": "jbzkfuQ4"}}
+
+        with patch.object(BTMinerAPI, "send_command", side_effect=send_command):
+            api = BTMinerAPI("10.0.0.50")
+            tokens = await asyncio.gather(*[api.get_token() for _ in range(10)])
+            self.assertEqual(api.send_command.call_count, 1)
+        self.assertTrue(all(token is tokens[0] for token in tokens))
+
+        # instances for the same miner share the refresh too
+        with patch.object(BTMinerAPI, "send_command", side_effect=send_command):
+            apis = [BTMinerAPI("10.0.0.51") for _ in range(3)]
+            await asyncio.gather(*[api.get_token() for api in apis])
+            self.assertEqual(BTMinerAPI.send_command.call_count, 1)
+            # a different password needs its own token
+            await BTMinerAPI("10.0.0.51", pwd="other").get_token()
+            self.assertEqual(BTMinerAPI.send_command.call_count, 2)
+
+        command = json.loads(create_privileged_cmd(tokens[0], {"cmd": "reboot"}))
+        self.assertEqual(
+            parse_btminer_priviledge_data(tokens[0], {"enc": command["data"]})["cmd"],
+            "reboot",
+        )
+
+
+class TestResponseFraming(unittest.IsolatedAsyncioTestCase):
+    def test_response_buffer(self):
+        buffer = ResponseBuffer()
+        self.assertFalse(buffer.feed(b'{"STATUS":[{"Msg":"}"'))
+        self.assertFalse(buffer.feed(b"}]"))
+        # the brace in the string keeps the counts unbalanced, so wait for the close
+        self.assertFalse(buffer.feed(b',"id":1}'))
+        self.assertTrue(buffer.feed(b""))
+
+        buffer = ResponseBuffer()
+        self.assertTrue(buffer.feed(b'{"id":1}\x00trailing'))
+        self.assertEqual(bytes(buffer.data), b'{"id":1}\x00')
+
+        # joined objects from a bmminer multicommand, split after the first object
+        buffer = ResponseBuffer(balanced_json=False)
+        self.assertFalse(buffer.feed(b'{"summary":[{}]}'))
+        self.assertTrue(buffer.feed(b'{"pools":[{}]}\x00'))
+        self.assertEqual(bytes(buffer.data), b'{"summary":[{}]}{"pools":[{}]}\x00')
+
+        buffer = ResponseBuffer(max_size=4)
+        self.assertTrue(buffer.feed(b'{"id":1}'))
+        self.assertTrue(buffer.truncated)
+        self.assertEqual(len(buffer), 4)
+
+    async def test_response_without_close(self):
+        response = json.dumps(
+            {"STATUS": [{"STATUS": "S", "Msg": "CGMiner versions"}], "id": 1}
+        ).encode("utf-8")
+        release = asyncio.Event()
+
+        async def handle(reader, writer):
+            await reader.read(4096)
+            # answer, but hold the connection open like some firmware does
+            writer.write(response + b"\x00")
+            await writer.drain()
+            await release.wait()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            api = CGMinerAPI("127.0.0.1", port=port)
+            start = time.monotonic()
+            data = await api.send_command("version")
+            self.assertLess(time.monotonic() - start, 1)
+            self.assertEqual(data["STATUS"][0]["Msg"], "CGMiner versions")
+        finally:
+            release.set()
+            server.close()
+            await server.wait_closed()
+
+
+class TestHostLimiter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        settings.update("host_connection_limit", 2)
+
+    def tearDown(self):
+        settings.update("host_connection_limit", None)
+        settings.update("host_connection_limits", {})
+
+    async def test_connections_limited(self):
+        open_connections = []
+        peak = 0
+
+        async def handle(reader, writer):
+            nonlocal peak
+            open_connections.append(writer)
+            peak = max(peak, len(open_connections))
+            await reader.read(4096)
+            await asyncio.sleep(0.05)
+            writer.write(b'{"id":1}\x00')
+            await writer.drain()
+            open_connections.remove(writer)
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            api = CGMinerAPI("127.0.0.1", port=port)
+            results = await asyncio.gather(
+                *[api.send_command("version") for _ in range(6)]
+            )
+        finally:
+            server.close()
+            await server.wait_closed()
+        self.assertEqual(results, [{"id": 1}] * 6)
+        self.assertEqual(peak, 2)
+
+    async def test_nested_connection(self):
+        settings.update("host_connection_limit", 1)
+
+        async def request():
+            async with host_limiter.connection("10.0.0.50"):
+                # a login inside a request doesn't wait for a second slot
+                async with host_limiter.connection("10.0.0.50"):
+                    pass
+
+        await asyncio.wait_for(request(), timeout=1)
+        self.assertEqual(host_limiter._hosts, {})
+
+    async def test_vendor_limit(self):
+        settings.update("host_connection_limit", None)
+        settings.update("host_connection_limits", {"WhatsMiner": 1})
+        miner = BTMinerM30SV10("10.0.0.50")
+        self.assertEqual(miner.api.vendor, "WhatsMiner")
+
+        in_flight = []
+        peaks = {}
+
+        async def connect(ip, vendor):
+            async with host_limiter.connection(ip, vendor):
+                in_flight.append(ip)
+                peaks[ip] = max(peaks.get(ip, 0), in_flight.count(ip))
+                await asyncio.sleep(0.01)
+                in_flight.remove(ip)
+
+        await asyncio.gather(
+            *[connect(miner.ip, miner.api.vendor) for _ in range(3)],
+            # other makes aren't limited
+            *[connect("10.0.0.51", "AntMiner") for _ in range(3)],
+        )
+        self.assertEqual(peaks, {"10.0.0.50": 1, "10.0.0.51": 3})
+        self.assertEqual(host_limiter.limit(miner.api.vendor), 1)
+        self.assertEqual(host_limiter._hosts, {})
+
+
+class TestResponseDecoding(unittest.TestCase):
+    def test_valid_response_unchanged(self):
+        data = {
+            "STATUS": [{"STATUS": "S", "Msg": "1 Pool(s)"}],
+            "POOLS": [{"URL": "stratum+tcp://nano.pool:3333", "User": "info.infinity"}],
+            "id": 1,
+        }
+        for api in [BMMinerAPI, BTMinerAPI, CGMinerAPI]:
+            with self.subTest(api=api.__name__):
+                parsed = api._load_api_data(json.dumps(data).encode() + b"\x00")
+                self.assertEqual(parsed, data)
+
+    def test_malformed_response_repaired(self):
+        for api, response in [
+            (BTMinerAPI, b'{"STATUS":"S","Msg":{"temp":75,},"id":1}'),
+            (CGMinerAPI, b'{"STATS":[{"MHS av":inf,"Temp":-nan}],"id":1}\x00'),
+            (BMMinerAPI, b'{"STATS":[{"a":1}{"b":2}],"id":1}\x00'),
+            # repairs for other firmware are still tried
+            (BMMinerAPI, b',"STATUS":"S","id":1}'),
+        ]:
+            with self.subTest(api=api.__name__, response=response):
+                self.assertIsInstance(api._load_api_data(response), dict)
+        self.assertEqual(
+            load_api_data(b'{"MHS av":inf,"Worker":"nan.inf"}'),
+            {"MHS av": 0, "Worker": "nan.inf"},
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
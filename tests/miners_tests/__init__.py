@@ -15,13 +15,26 @@
 # ------------------------------------------------------------------------------
 import asyncio
 import inspect
+import json
+import os
+import socket
 import sys
+import tempfile
 import unittest
 import warnings
+from unittest.mock import patch
 
+import httpx
+
+from pyasic.miners.affinity import SubnetAffinity
 from pyasic.miners.backends import CGMiner  # noqa
 from pyasic.miners.base import BaseMiner
-from pyasic.miners.miner_factory import MINER_CLASSES, MinerFactory
+from pyasic.miners.cache import MinerCache
+from pyasic.miners.fingerprint import SignatureRegistry
+from pyasic.miners.inventory import MinerInventory
+from pyasic.miners.miner_factory import MINER_CLASSES, MinerFactory, MinerTypes
+from pyasic.miners.miner_listener import MinerListener
+from pyasic.miners.oui import OUITable
 
 
 class MinersTest(unittest.TestCase):
@@ -76,5 +89,326 @@ class MinersTest(unittest.TestCase):
                     self.assertEqual(miner_keys, keys)
 
 
+class MinerFactoryInventoryTest(unittest.IsolatedAsyncioTestCase):
+    async def test_inventory_warm_start(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "inventory.json")
+            inventory = MinerInventory(path)
+            inventory.update(
+                "10.0.0.5",
+                miner_type=MinerTypes.ANTMINER.name,
+                model="ANTMINER S19",
+                firmware="BMMiner",
+            )
+            inventory.save()
+
+            factory = MinerFactory(inventory=MinerInventory(path))
+            with patch.object(
+                factory, "_verify_miner_type", return_value=True
+            ) as verify, patch.object(factory, "_get_miner_type") as get_type:
+                miner = await factory.get_miner("10.0.0.5")
+
+            verify.assert_called_once_with("10.0.0.5", MinerTypes.ANTMINER)
+            get_type.assert_not_called()
+            self.assertIsInstance(
+                miner, MINER_CLASSES[MinerTypes.ANTMINER]["ANTMINER S19"]
+            )
+
+    async def test_inventory_changed_miner(self):
+        inventory = MinerInventory()
+        inventory.update("10.0.0.5", miner_type=MinerTypes.ANTMINER.name)
+        factory = MinerFactory(inventory=inventory)
+        with patch.object(
+            factory, "_verify_miner_type", return_value=False
+        ), patch.object(factory, "_get_miner_type", return_value=None) as get_type:
+            miner = await factory.get_miner("10.0.0.5")
+
+        get_type.assert_called()
+        self.assertIsNone(miner)
+
+    async def test_oui_shortcut(self):
+        factory = MinerFactory(oui=OUITable({"AA:BB:CC": MinerTypes.ANTMINER.name}))
+        with patch.object(
+            factory, "_probe_miner_type", return_value=MinerTypes.ANTMINER
+        ) as probe, patch.object(factory, "_get_miner_type") as get_type, patch.object(
+            factory, "_get_model_antminer_sock", return_value="ANTMINER S19"
+        ), patch.object(
+            factory, "_get_model_antminer_web", return_value=None
+        ):
+            miner = await factory.get_miner("10.0.0.5", mac="aa-bb-cc-01-02-03")
+
+        probe.assert_called_once_with("10.0.0.5", MinerTypes.ANTMINER)
+        get_type.assert_not_called()
+        self.assertIsInstance(miner, MINER_CLASSES[MinerTypes.ANTMINER]["ANTMINER S19"])
+        self.assertEqual(factory.oui.hit_rate, 1)
+
+        # a miss falls back to the full fingerprint, and is learned from
+        factory = MinerFactory()
+        factory.oui.learn("AA:BB:CC:00:00:01", MinerTypes.WHATSMINER.name)
+        with patch.object(
+            factory, "_probe_miner_type", return_value=None
+        ), patch.object(
+            factory, "_get_miner_type", return_value=MinerTypes.ANTMINER
+        ) as get_type, patch.object(
+            factory, "_get_model_antminer_sock", return_value="ANTMINER S19"
+        ), patch.object(
+            factory, "_get_model_antminer_web", return_value=None
+        ):
+            await factory.get_miner("10.0.0.6", mac="AA:BB:CC:00:00:02")
+            await factory.get_miner("10.0.0.7", mac="AA:BB:CC:00:00:03")
+
+        self.assertEqual(get_type.call_count, 2)
+        self.assertEqual(factory.oui.hits, 0)
+        self.assertEqual(factory.oui.misses, 2)
+        self.assertEqual(factory.oui.lookup("AA:BB:CC:00:00:04"), "ANTMINER")
+
+    async def test_oui_wrong_type_is_miss(self):
+        factory = MinerFactory(oui=OUITable({"AA:BB:CC": MinerTypes.ANTMINER.name}))
+        tried = []
+        with patch.object(
+            factory, "_probe_miner_type", return_value=MinerTypes.WHATSMINER
+        ):
+            miner_type = await factory._get_miner_type_from_mac(
+                "10.0.0.5", "AA:BB:CC:01:02:03", tried
+            )
+        self.assertEqual(miner_type, MinerTypes.WHATSMINER)
+        self.assertEqual((factory.oui.hits, factory.oui.misses), (0, 1))
+        self.assertEqual(tried, [MinerTypes.ANTMINER])
+
+    def test_oui_defaults(self):
+        oui = OUITable()
+        self.assertEqual(oui.lookup("e0:a5:09:12:34:56"), MinerTypes.ANTMINER.name)
+        # learned and registered prefixes take precedence
+        oui.learn("E0:A5:09:00:00:01", MinerTypes.BRAIINS_OS.name)
+        self.assertEqual(oui.lookup("E0:A5:09:12:34:56"), MinerTypes.BRAIINS_OS.name)
+        oui.register("E0:A5:09", MinerTypes.VNISH.name)
+        self.assertEqual(oui.lookup("E0:A5:09:12:34:56"), MinerTypes.VNISH.name)
+        self.assertIsNone(OUITable(defaults={}).lookup("E0:A5:09:12:34:56"))
+
+    async def test_subnet_affinity(self):
+        factory = MinerFactory()
+        with patch.object(
+            factory, "_probe_miner_type", return_value=MinerTypes.ANTMINER
+        ) as probe, patch.object(
+            factory, "_get_miner_type", return_value=MinerTypes.ANTMINER
+        ) as get_type, patch.object(
+            factory, "_get_model_antminer_sock", return_value="ANTMINER S19"
+        ) as sock, patch.object(
+            factory, "_get_model_antminer_web", return_value=None
+        ) as web:
+            for ip in ["10.0.0.5", "10.0.0.6", "10.0.0.7", "10.0.1.5"]:
+                miner = await factory.get_miner(ip)
+                self.assertIsInstance(
+                    miner, MINER_CLASSES[MinerTypes.ANTMINER]["ANTMINER S19"]
+                )
+
+        # only the first host of each subnet was fully identified
+        self.assertEqual(get_type.call_count, 2)
+        self.assertEqual(probe.call_count, 2)
+        self.assertEqual(sock.call_count, 4)
+        self.assertEqual(web.call_count, 2)
+        stats = factory.affinity.stats
+        self.assertEqual(stats["subnets"], 2)
+        self.assertEqual(stats["type"]["hit_rate"], 1)
+        self.assertEqual(stats["model"]["hits"], 2)
+
+    async def test_identification_reuses_responses(self):
+        commands = []
+
+        async def handle(reader, writer):
+            commands.append(json.loads(await reader.read(4096))["command"])
+            response = {
+                "STATUS": [{"STATUS": "S", "Msg": "BMMiner"}],
+                "VERSION": [{"Type": "Antminer S19", "BMMiner": "1.0"}],
+            }
+            writer.write(json.dumps(response).encode("utf-8") + b"\x00")
+            await writer.drain()
+            writer.close()
+
+        try:
+            server = await asyncio.start_server(handle, "127.0.0.2", 4028)
+        except OSError:
+            self.skipTest("Can't listen on 127.0.0.2:4028")
+
+        factory = MinerFactory()
+        async with server:
+            with patch.object(factory, "_get_miner_web", return_value=None):
+                miner = await factory.get_miner("127.0.0.2")
+
+        self.assertIsInstance(miner, MINER_CLASSES[MinerTypes.ANTMINER]["ANTMINER S19"])
+        # the model was read from the version response fetched to find the type
+        self.assertEqual(commands.count("version"), 1)
+        self.assertLessEqual(factory.identify_stats["connections_per_miner"], 2)
+
+
+class MinerCacheTest(unittest.TestCase):
+    def test_miner_cache(self):
+        now = 1000.0
+        with patch("pyasic.miners.cache.time.monotonic", side_effect=lambda: now):
+            cache = MinerCache(max_size=2, ttl=60, negative_ttl=10, max_negative_ttl=25)
+            cache["10.0.0.1"] = "miner 1"
+            cache["10.0.0.2"] = "miner 2"
+            self.assertEqual(cache["10.0.0.1"], "miner 1")
+            # 10.0.0.2 is least recently used
+            cache["10.0.0.3"] = "miner 3"
+            self.assertNotIn("10.0.0.2", cache)
+            self.assertEqual(cache.evictions, 1)
+
+            now += 61
+            with self.assertRaises(KeyError):
+                cache["10.0.0.1"]
+            self.assertEqual(cache.expirations, 1)
+
+            # failures back off 10, 20, then the 25 second cap
+            cache.clear()
+            for ttl in [10, 20, 25]:
+                cache.set_failed("10.0.0.4")
+                self.assertIsNone(cache["10.0.0.4"])
+                now += ttl - 1
+                self.assertIn("10.0.0.4", cache)
+                now += 1
+                self.assertNotIn("10.0.0.4", cache)
+
+        stats = cache.stats
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["negative_hits"], 3)
+        self.assertEqual(stats["misses"], 1)
+
+
+class MinerFactoryTest(unittest.IsolatedAsyncioTestCase):
+    async def test_miner_generator_bounded(self):
+        in_flight = 0
+        max_in_flight = 0
+
+        async def fake_get_miner(ip):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.02 if ip == "10.0.0.0" else 0.001)
+            in_flight -= 1
+            return None if ip == "10.0.0.9" else ip
+
+        async def ips():
+            for i in range(20):
+                await asyncio.sleep(0)
+                yield f"10.0.0.{i}"
+
+        factory = MinerFactory()
+        with patch.object(factory, "get_miner", side_effect=fake_get_miner):
+            results = [m async for m in factory.get_miner_generator(ips(), limit=4)]
+            listed = await factory.get_multiple_miners(
+                [f"10.0.0.{i}" for i in range(6)], limit=4
+            )
+
+        self.assertEqual(len(results), 19)
+        self.assertLessEqual(max_in_flight, 4)
+        # the slow first miner doesn't hold up the rest
+        self.assertNotEqual(results[0], "10.0.0.0")
+        self.assertEqual(sorted(listed), [f"10.0.0.{i}" for i in range(6)])
+
+    async def test_web_client_shared(self):
+        async with MinerFactory() as factory:
+            client = factory.web_client()
+            self.assertIs(factory.web_client(), client)
+        self.assertTrue(client.is_closed)
+        # a closed factory opens a new client when used again
+        self.assertIsNot(factory.web_client(), client)
+        await factory.close()
+
+        # a client from another event loop is replaced and closed
+        factory = MinerFactory()
+        stale = factory.web_client()
+        factory._web_client_loop = object()
+        client = factory.web_client()
+        self.assertIsNot(client, stale)
+        await factory.close()
+        self.assertTrue(stale.is_closed)
+        # cookies from one miner aren't kept for the next
+        response = httpx.Response(
+            200,
+            headers={"Set-Cookie": "sysauth=1; Path=/"},
+            request=httpx.Request("GET", "http://10.0.0.5/"),
+        )
+        client.cookies.extract_cookies(response)
+        self.assertEqual(len(client.cookies.jar), 0)
+
+    def test_signature_registry(self):
+        parse = MinerFactory._parse_socket_type
+        self.assertEqual(parse('{"Msg":"BOSer versions"}'), MinerTypes.BRAIINS_OS)
+        self.assertEqual(parse('{"Type":"Antminer S19"}'), MinerTypes.ANTMINER)
+        self.assertIsNone(parse('{"DEVDETAILS":[{"Model":"Antminer S19"}]}'))
+
+        registry = SignatureRegistry()
+        registry.register("Miner", "generic", priority=1)
+        custom = registry.register("MyMiner OS", "custom")
+        self.assertEqual(registry.match("<title>MyMiner OS</title>"), "custom")
+        registry.unregister(custom)
+        self.assertEqual(registry.match("<title>MyMiner OS</title>"), "generic")
+        self.assertIsNone(registry.match("<title>Router</title>"))
+
+    async def test_web_fingerprint_partial(self):
+        connections = 0
+
+        async def handle(reader, writer):
+            nonlocal connections
+            connections += 1
+            await reader.readuntil(b"\r\n\r\n")
+            body = b"<html><title>Braiins OS</title>" + b"x" * 2_000_000
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode()
+            )
+            try:
+                writer.write(body)
+                await writer.drain()
+            except ConnectionError:
+                pass
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server, MinerFactory() as factory:
+            miner_type = await factory._get_miner_web(f"127.0.0.1:{port}")
+            text, _ = await factory._web_ping(
+                factory.web_client(), f"http://127.0.0.1:{port}/"
+            )
+
+        self.assertEqual(miner_type, MinerTypes.BRAIINS_OS)
+        self.assertLessEqual(len(text), 8192)
+        # https was never tried
+        self.assertEqual(connections, 2)
+
+
+class MinerListenerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_listener_burst(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+
+        listener = MinerListener()
+        found = []
+
+        async def listen():
+            async for miner in listener.listen():
+                found.append(miner)
+                if len(found) == 50:
+                    await listener.cancel()
+
+        with patch.object(MinerListener, "PORTS", [port]):
+            task = asyncio.create_task(listen())
+            await asyncio.sleep(0.1)
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                for i in range(50):
+                    s.sendto(
+                        f"10.0.0.{i},aa:bb:cc:dd:ee:{i:02x}".encode(),
+                        ("127.0.0.1", port),
+                    )
+                s.sendto(b"\xff", ("127.0.0.1", port))
+            await asyncio.wait_for(task, 5)
+
+        self.assertEqual([m["IP"] for m in found], [f"10.0.0.{i}" for i in range(50)])
+        self.assertEqual(found[1]["MAC"], "AA:BB:CC:DD:EE:01")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -14,10 +14,24 @@
 #  limitations under the License.                                              -
 # ------------------------------------------------------------------------------
 
+import asyncio
 import ipaddress
+import os
+import queue
+import tempfile
+import time
 import unittest
+from unittest.mock import patch
 
-from pyasic.network import MinerNetwork
+from pyasic import settings
+from pyasic.network import MinerNetwork, ping
+from pyasic.network.checkpoint import ScanCheckpoint
+from pyasic.network.concurrency import AdaptiveConcurrency
+from pyasic.network.hosts import HostSet
+from pyasic.network.neighbors import parse_neighbors
+from pyasic.network.progress import ScanProgress
+from pyasic.network.rate_limit import SubnetRateLimiter
+from pyasic.network.sharding import ShardError, _scan_shard
 
 
 class NetworkTest(unittest.TestCase):
@@ -73,6 +87,263 @@ class NetworkTest(unittest.TestCase):
             net.hosts, list(ipaddress.ip_network("192.168.1.0/24").hosts())
         )
 
+    def test_net_overlapping_list(self):
+        net = MinerNetwork.from_list(["10.0.0.1-20", "10.0.0.10-30", "10.0.0.5"])
+        self.assertEqual(len(net), 30)
+        self.assertEqual(net.hosts, HostSet.from_octets("10", "0", "0", "1-30"))
+
+    def test_net_lazy_hosts(self):
+        net = MinerNetwork.from_subnet("10.0.0.0/8")
+        self.assertEqual(len(net), 2**24 - 2)
+        self.assertEqual(len(net.hosts.intervals), 1)
+        self.assertIn("10.200.3.4", net)
+        self.assertNotIn("11.0.0.1", net)
+        self.assertEqual(net.hosts[-1], ipaddress.IPv4Address("10.255.255.254"))
+
+    def test_net_exclude(self):
+        net = MinerNetwork.from_subnet("192.168.1.0/24").exclude(
+            ["192.168.1.10-19", "192.168.1.128/25"]
+        )
+        self.assertEqual(len(net), 254 - 10 - 127)
+        self.assertNotIn("192.168.1.15", net)
+        self.assertNotIn("192.168.1.200", net)
+        self.assertEqual(
+            list(net.hosts.iter_from(8))[:3],
+            [
+                ipaddress.IPv4Address("192.168.1.9"),
+                ipaddress.IPv4Address("192.168.1.20"),
+                ipaddress.IPv4Address("192.168.1.21"),
+            ],
+        )
+
+    def test_net_split(self):
+        hosts = MinerNetwork.from_list(["10.0.0.1-10", "10.0.5.1-30"]).hosts
+        shards = hosts.split(3)
+        self.assertEqual([len(shard) for shard in shards], [13, 13, 14])
+        self.assertEqual([h for shard in shards for h in shard], list(hosts))
+        self.assertEqual(list(hosts[8:12]), list(hosts)[8:12])
+
+    def test_net_version_mismatch(self):
+        hosts = HostSet.from_subnet("10.0.0.0/24")
+        self.assertIn("10.0.0.5", hosts)
+        self.assertNotIn("::a00:5", hosts)
+        with self.assertRaises(ValueError):
+            hosts.index("::a00:5")
+        with self.assertRaises(ValueError):
+            HostSet.from_addresses(["10.0.0.1", "::1"])
+
+    def test_net_interleaved(self):
+        hosts = MinerNetwork.from_list(["10.0.0.1-3", "10.0.1.1-2", "10.0.2.1"]).hosts
+        self.assertEqual(
+            [str(h) for h in hosts.iter_interleaved(24)],
+            ["10.0.0.1", "10.0.1.1", "10.0.2.1", "10.0.0.2", "10.0.1.2", "10.0.0.3"],
+        )
+
+    def test_adaptive_concurrency(self):
+        concurrency = AdaptiveConcurrency(initial=20, minimum=10, maximum=40)
+        for _ in range(20):
+            concurrency.record(latency=0.01)
+        self.assertEqual(concurrency.limit, 40)
+
+        # a burst of timeouts well above the baseline should halve the limit
+        for _ in range(40):
+            concurrency.record(timeout=True)
+        self.assertEqual(concurrency.limit, 20)
+        self.assertEqual(
+            [d.action for d in concurrency.history], ["increase", "decrease"]
+        )
+        self.assertEqual(concurrency.stats["timeouts"], 40)
+
+    def test_shard_failure_reported(self):
+        from pyasic.miners.miner_factory import miner_factory
+
+        async def fail(*args, **kwargs):
+            raise OSError("Too many open files")
+            yield
+
+        results = queue.Queue()
+        inventory = miner_factory.inventory
+        try:
+            with patch.object(MinerNetwork, "scan_network_generator", fail):
+                _scan_shard(0, [(1, 2)], 4, {}, None, results)
+        finally:
+            miner_factory.inventory = inventory
+        shard, result = results.get_nowait()
+        self.assertIsInstance(result, ShardError)
+        self.assertIn("Too many open files", str(result))
+
+
+class NetworkScanTest(unittest.IsolatedAsyncioTestCase):
+    async def test_scan_window_bounded(self):
+        in_flight = 0
+        max_in_flight = 0
+
+        async def fake_ping(ip, *args):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.001 * (int(ip) % 3))
+            in_flight -= 1
+            return str(ip) if int(ip) % 2 else None
+
+        net = MinerNetwork.from_subnet("10.0.0.0/24")
+        with patch.object(MinerNetwork, "_ping_and_get_miner", side_effect=fake_ping):
+            results = [m async for m in net._scan_window(iter(net.hosts), window=16)]
+
+        self.assertEqual(len(results), 254)
+        self.assertEqual(len([r for r in results if r is not None]), 127)
+        self.assertLessEqual(max_in_flight, 16)
+
+    async def test_scan_survives_identification_error(self):
+        from pyasic.miners.miner_factory import miner_factory
+
+        class FakeMiner:
+            def __init__(self, ip):
+                self.ip = str(ip)
+
+        async def get_miner(ip, mac=None):
+            if str(ip) == "10.0.0.3":
+                raise KeyError("Type")
+            return FakeMiner(ip)
+
+        net = MinerNetwork.from_subnet("10.0.0.0/29")
+        with patch("pyasic.network.ping", return_value=80), patch.object(
+            miner_factory, "get_miner", side_effect=get_miner
+        ):
+            miners = await net.scan()
+
+        self.assertEqual(
+            sorted(m.ip for m in miners),
+            [f"10.0.0.{i}" for i in range(1, 7) if i != 3],
+        )
+
+    async def test_scan_checkpoint_resume(self):
+        class FakeMiner:
+            def __init__(self, ip):
+                self.ip = str(ip)
+
+        async def fake_ping(ip, *args):
+            await asyncio.sleep(0)
+            return FakeMiner(ip) if int(ip) % 10 == 0 else None
+
+        net = MinerNetwork.from_subnet("10.0.0.0/24")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "scan.json")
+            checkpoint = ScanCheckpoint(path, net.hosts, interval=0)
+            with patch.object(
+                MinerNetwork, "_ping_and_get_miner", side_effect=fake_ping
+            ):
+                scan = net._scan_window(iter(net.hosts), 8, checkpoint=checkpoint)
+                results = []
+                async for miner in scan:
+                    results.append(miner)
+                    if len(results) == 100:
+                        break
+                await scan.aclose()
+
+            resumed = ScanCheckpoint(path, net.hosts)
+            self.assertGreater(resumed.position, 90)
+            self.assertLessEqual(resumed.position, 100)
+            found = [m.ip for m in results if m is not None]
+            self.assertTrue(set(resumed.found_ips).issubset(found))
+            self.assertTrue(
+                all(net.hosts.index(ip) < resumed.position for ip in resumed.found)
+            )
+
+            other = ScanCheckpoint(path, MinerNetwork.from_subnet("10.0.1.0/24").hosts)
+            self.assertEqual(other.position, 0)
+
+    async def test_scan_progress(self):
+        async def fake_ping(ip, *args):
+            await asyncio.sleep(0)
+            return str(ip) if int(ip) % 4 == 0 else None
+
+        updates = []
+        net = MinerNetwork.from_subnet("10.0.0.0/28")
+        progress = ScanProgress(len(net), callback=updates.append, interval=0)
+        with patch.object(MinerNetwork, "_ping_and_get_miner", side_effect=fake_ping):
+            async for _ in net._scan_window(iter(net.hosts), 4, progress=progress):
+                pass
+        await progress.finish()
+
+        self.assertEqual(progress.probed, 14)
+        self.assertEqual(progress.identified, 3)
+        self.assertEqual(progress.eta, 0)
+        self.assertIs(updates[-1], progress)
+
+        for seconds in [0.001, 0.02, 0.02, 3]:
+            progress.record_phase("connect", seconds)
+        connect = progress.as_dict()["phases"]["connect"]
+        self.assertEqual(progress.alive, 4)
+        self.assertEqual(connect["count"], 4)
+        self.assertEqual(connect["p50"], 0.025)
+        self.assertEqual(connect["max"], 3)
+
+    async def test_subnet_rate_limit(self):
+        limiter = SubnetRateLimiter(rate=100, burst=2, prefix=24)
+        start = time.monotonic()
+        for ip in ["10.0.0.1", "10.0.0.2", "10.0.1.1", "10.0.1.2"]:
+            await limiter.acquire(ip)
+        # each subnet still had its burst available
+        self.assertEqual(limiter.waits, 0)
+        await limiter.acquire("10.0.0.3")
+        self.assertEqual(limiter.waits, 1)
+        self.assertGreaterEqual(time.monotonic() - start, 0.005)
+
+    async def test_ping_races_ports(self):
+        server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+        open_port = server.sockets[0].getsockname()[1]
+        # grab a port that is known to be closed
+        closed = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+        closed_port = closed.sockets[0].getsockname()[1]
+        closed.close()
+        await closed.wait_closed()
+
+        async with server:
+            port = await ping("127.0.0.1", [closed_port, open_port])
+            self.assertEqual(port, open_port)
+            with self.assertRaises(ConnectionRefusedError):
+                await ping("127.0.0.1", [closed_port])
+
+    async def test_neighbor_seeded_order(self):
+        neighbors = parse_neighbors(
+            "IP address       HW type     Flags       HW address            Mask     Device\n"
+            "10.0.0.200       0x1         0x2         aa:bb:cc:00:00:01     *        eth0\n"
+            "10.0.0.7         0x1         0x0         00:00:00:00:00:00     *        eth0\n"
+            "10.0.1.5         0x1         0x2         aa:bb:cc:00:00:02     *        eth0\n"
+            "10.0.0.100 dev eth0 lladdr aa:bb:cc:00:00:03 REACHABLE\n"
+            "10.0.0.8 dev eth0 INCOMPLETE\n"
+        )
+        self.assertEqual(
+            neighbors,
+            {
+                "10.0.0.200": "AA:BB:CC:00:00:01",
+                "10.0.1.5": "AA:BB:CC:00:00:02",
+                "10.0.0.100": "AA:BB:CC:00:00:03",
+            },
+        )
+
+        probed = []
+
+        async def fake_ping(ip, *args):
+            probed.append(str(ip))
+
+        net = MinerNetwork.from_subnet("10.0.0.0/24")
+        with patch.object(MinerNetwork, "_ping_and_get_miner", side_effect=fake_ping):
+            async for _ in net.scan_network_generator(neighbors=neighbors):
+                pass
+            self.assertEqual(probed[:3], ["10.0.0.100", "10.0.0.200", "10.0.0.1"])
+            self.assertEqual(len(probed), 254)
+
+            probed.clear()
+            settings.update("network_scan_neighbors_only", True)
+            try:
+                async for _ in net.scan_network_generator(neighbors=neighbors):
+                    pass
+            finally:
+                settings.update("network_scan_neighbors_only", False)
+            self.assertEqual(probed, ["10.0.0.100", "10.0.0.200"])
+
 
 if __name__ == "__main__":
     unittest.main()